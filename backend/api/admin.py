@@ -1,32 +1,134 @@
 from django.contrib import admin
-from .models import Task, Employee, Comment
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+from .models import Task, Employee, Comment, Job
 # Register your models here.
 
+ADMIN_COUNT_LIMIT = 10_000  # 带过滤条件的列表最多数到这么多行，超过后只能翻到这里
+
+
+def estimated_count(queryset):
+    """PostgreSQL 统计信息里的行数估计（ANALYZE / autovacuum 更新）；其他数据库返回 None"""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                       [connection.ops.quote_name(queryset.model._meta.db_table)])
+        row = cursor.fetchone()
+    return row[0] if row and row[0] >= 0 else None  # 从未 ANALYZE 的表是 -1
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    大表的后台列表不做全表 COUNT(*)：
+    - 没有过滤条件时用统计信息的估计值（行数不多时仍然精确计数）
+    - 有过滤条件时只数到 ADMIN_COUNT_LIMIT 行（COUNT 外面套一层 LIMIT）
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.has_filters():
+            estimate = estimated_count(queryset)
+            if estimate is not None and estimate > ADMIN_COUNT_LIMIT:
+                return estimate
+        return queryset.order_by()[:ADMIN_COUNT_LIMIT].count()
+
+
+class EmployeeFilter(admin.SimpleListFilter):
+    """按员工 ID 过滤：侧边栏里是一个输入框，不会把所有员工读出来当选项"""
+    template = 'admin/api/input_filter.html'
+    field_name = None
+
+    def lookups(self, request, model_admin):
+        return ()
+
+    def has_output(self):
+        return True
+
+    def queryset(self, request, queryset):
+        if not self.value():
+            return queryset
+        try:
+            pk = int(self.value())
+        except ValueError:
+            raise IncorrectLookupParameters(f'{self.parameter_name}: Ganzzahl erwartet')  # 后台重定向到 ?e=1，而不是 500
+        return queryset.filter(**{f'{self.field_name}_id': pk})
+
+    def choices(self, changelist):
+        # 输入框所在的表单要带上其他过滤参数；换了员工从第一页开始
+        hidden = [
+            (name, value)
+            for name, values in changelist.params.items() if name not in (self.parameter_name, 'p')
+            for value in (values if isinstance(values, list) else [values])
+        ]
+        yield {'parameter_name': self.parameter_name, 'value': self.value() or '', 'hidden': hidden}
+
+
+class TaskEmployeeFilter(EmployeeFilter):
+    title = 'Mitarbeiter (ID)'
+    parameter_name = field_name = 'employee'
+
+
+class CommentAuthorFilter(EmployeeFilter):
+    title = 'Autor (ID)'
+    parameter_name = field_name = 'author'
+
+
+class ScalableModelAdmin(admin.ModelAdmin):
+    """百万行级别的表：估计行数、不做第二次全表计数"""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
+
+
 @admin.register(Employee)
-class EmployeeAdmin(admin.ModelAdmin):
+class EmployeeAdmin(ScalableModelAdmin):
     list_display = ['firstname', 'lastname','department', 'role','created_at']
-    search_fields = ['firstname', 'lastname', 'department']
+    search_fields = ['firstname', 'lastname', 'department']  # 也用于其他后台页面的员工自动补全
     list_filter = ['department', 'created_at', 'role']
     ordering = ['lastname']
 
 @admin.register(Task)
-class TaskAdmin(admin.ModelAdmin):  # 列表显示的字段
+class TaskAdmin(ScalableModelAdmin):  # 列表显示的字段
     list_display = ['title', 'status','priority', 'description','start_date', 'end_date', 'employee', 'version','created_by', 'created_at']
+    list_select_related = ['employee', 'created_by']  # 员工列一起 JOIN，不是每行再查一次
     search_fields = ['title', 'employee__firstname', 'employee__lastname']
-    list_filter = ['status', 'priority', 'start_date', 'end_date', 'created_at']
+    # 日期过滤的选项是固定的（今天、过去 7 天……），不查数据库；
+    # 不用 date_hierarchy，它要对整张表做 DISTINCT 日期查询
+    list_filter = ['status', 'priority', TaskEmployeeFilter, 'start_date', 'end_date', 'created_at']
     list_editable = ['status', 'priority']  # 可以在列表页直接修改状态
-    date_hierarchy = 'start_date'  # 按日期分层浏览
-   
+    autocomplete_fields = ['employee', 'tester', 'created_by']  # 编辑页不渲染包含所有员工的下拉框
+
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(ScalableModelAdmin):
     list_display = ['get_short_text', 'author', 'task', 'created_at']
+    list_select_related = ['author', 'task']
     search_fields = ['text', 'author__firstname', 'task__title']
-    list_filter = ['created_at', 'author']
+    list_filter = ['created_at', CommentAuthorFilter]
     readonly_fields = ['created_at', 'updated_at']
-    
+    autocomplete_fields = ['author', 'task']
+
+    def get_queryset(self, request):
+        # 任务列只显示标题，不读任务的描述
+        return super().get_queryset(request).defer('task__description')
+
     # 显示评论的前50个字符
     def get_short_text(self, obj):
         return obj.text[:50] + '...' if len(obj.text) > 50 else obj.text
     get_short_text.short_description = 'Kommentar'
 
+
+@admin.register(Job)
+class JobAdmin(ScalableModelAdmin):
+    list_display = ['id', 'kind', 'status', 'progress', 'processed', 'total', 'worker', 'created_at', 'finished_at']
+    list_filter = ['status', 'kind', 'created_at']
+    readonly_fields = ['processed', 'total', 'result', 'error', 'worker', 'created_at', 'started_at', 'finished_at']
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer('params')
@@ -1,6 +1,21 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
+
+
+def setup_search_index(sender, using, **kwargs):
+    from .search import ensure_search_index
+    ensure_search_index(using)
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from . import signals  # noqa: F401  注册缓存失效的 signal
+        # 每次 migrate 之后补齐全文检索索引（见 api/search.py）
+        post_migrate.connect(setup_search_index, sender=self, dispatch_uid='api_setup_search_index')
+        # 每个数据库连接都装上查询统计的包装（没有在统计的请求时只多一次 ContextVar 读取），见 api/profiling.py
+        from .profiling import install_wrapper
+        connection_created.connect(install_wrapper, dispatch_uid='api_profiling')
@@ -0,0 +1,112 @@
+"""
+热/冷数据分离：状态为“已归档”且超过保留期的任务连同评论移到 ArchivedTask / ArchivedComment
+
+- 分批：每批一个短事务（复制到归档表 + 从热表删除），其他写操作不会被长时间阻塞
+- 支持 SKIP LOCKED 的数据库（PostgreSQL）上跳过正被其他事务修改的任务
+- 直接按 ID 删除，不逐条加载对象发送 signal：已归档的任务不影响工作量统计，评论随任务一起移走，
+  全文检索索引由触发器同步
+"""
+import time
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .cache import bump_generation_on_commit
+from .models import ARCHIVED_STATUS, ArchivedComment, ArchivedTask, Comment, Task
+
+ARCHIVE_BATCH_SIZE = 500
+
+# 热表和归档表共有的列（Task 的 priority_rank 是数据库生成的列，不复制）
+TASK_COLUMNS = [f.attname for f in ArchivedTask._meta.concrete_fields if f.name != 'archived_at']
+COMMENT_COLUMNS = [f.attname for f in ArchivedComment._meta.concrete_fields]
+
+
+def delete_ids(model, ids, column='id'):
+    """DELETE ... WHERE column IN (...)，绕过 Django 的级联收集和 signal"""
+    table = connection.ops.quote_name(model._meta.db_table)
+    placeholders = ', '.join(['%s'] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table} WHERE {connection.ops.quote_name(column)} IN ({placeholders})', ids)
+
+
+def locked_batch(queryset, batch_size):
+    if connection.features.has_select_for_update_skip_locked:
+        queryset = queryset.select_for_update(skip_locked=True)
+    return list(queryset.order_by('id').values_list('id', flat=True)[:batch_size])
+
+
+def archivable(older_than_days):
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    return Task.objects.filter(status=ARCHIVED_STATUS, updated_at__lt=cutoff)
+
+
+def archive_tasks(older_than_days, batch_size=ARCHIVE_BATCH_SIZE, limit=None, pause=0):
+    """把超过保留期的已归档任务移到归档表；返回 (任务数, 评论数)"""
+    tasks_moved = comments_moved = 0
+    queryset = archivable(older_than_days)
+    while limit is None or tasks_moved < limit:
+        size = batch_size if limit is None else min(batch_size, limit - tasks_moved)
+        with transaction.atomic():
+            ids = locked_batch(queryset, size)
+            if not ids:
+                break
+            now = timezone.now()
+            ArchivedTask.objects.bulk_create([
+                ArchivedTask(archived_at=now, **row) for row in Task.objects.filter(id__in=ids).values(*TASK_COLUMNS)
+            ])
+            comments = [
+                ArchivedComment(**row) for row in Comment.objects.filter(task_id__in=ids).values(*COMMENT_COLUMNS)
+            ]
+            ArchivedComment.objects.bulk_create(comments, batch_size=1000)
+            delete_ids(Comment, ids, column='task_id')
+            delete_ids(Task, ids)
+        tasks_moved += len(ids)
+        comments_moved += len(comments)
+        if pause:
+            time.sleep(pause)  # 给其他写操作让出锁
+    if tasks_moved:
+        bump_generation_on_commit(Task, Comment)
+    return tasks_moved, comments_moved
+
+
+def restore_tasks(ids):
+    """把归档的任务和评论移回热表（ID 和时间戳不变），返回恢复的任务数"""
+    with transaction.atomic():
+        rows = list(ArchivedTask.objects.filter(id__in=ids).values(*TASK_COLUMNS))
+        if not rows:
+            return 0
+        ids = [row['id'] for row in rows]
+        comment_rows = list(ArchivedComment.objects.filter(task_id__in=ids).values(*COMMENT_COLUMNS))
+        tasks = [Task(**row) for row in rows]
+        comments = [Comment(**row) for row in comment_rows]
+        Task.objects.bulk_create(tasks)
+        Comment.objects.bulk_create(comments, batch_size=1000)
+        # bulk_create 会用当前时间覆盖 auto_now / auto_now_add 的列，再写回原来的时间
+        for objects, originals in ((tasks, rows), (comments, comment_rows)):
+            for obj, row in zip(objects, originals):
+                obj.created_at, obj.updated_at = row['created_at'], row['updated_at']
+        Task.objects.bulk_update(tasks, ['created_at', 'updated_at'], batch_size=1000)
+        Comment.objects.bulk_update(comments, ['created_at', 'updated_at'], batch_size=1000)
+        ArchivedTask.objects.filter(id__in=ids).delete()  # 评论级联删除
+    bump_generation_on_commit(Task, Comment)
+    return len(ids)
+
+
+def expired(older_than_days):
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    return ArchivedTask.objects.filter(archived_at__lt=cutoff)
+
+
+def purge_archive(older_than_days, batch_size=ARCHIVE_BATCH_SIZE):
+    """彻底删除归档时间超过保留期的任务（连同评论），返回删除的任务数"""
+    queryset = expired(older_than_days).order_by('id')
+    purged = 0
+    while True:
+        with transaction.atomic():
+            ids = list(queryset.values_list('id', flat=True)[:batch_size])
+            if not ids:
+                return purged
+            delete_ids(ArchivedComment, ids, column='task_id')
+            delete_ids(ArchivedTask, ids)
+        purged += len(ids)
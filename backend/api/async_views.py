@@ -0,0 +1,112 @@
+"""
+异步只读接口：在 ASGI 下整个请求都在事件循环里完成，不占用线程池
+GET /api/async/tasks/                  任务列表，过滤参数与 /api/tasks/ 相同，支持 fields / expand / limit
+GET /api/async/tasks/<id>/             任务详情
+GET /api/async/tasks/<id>/comments/    某个任务的评论
+列表不分页，用 aiterator() 分块读取并以 JSON 数组流式返回；慢客户端只占用一个协程
+"""
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+
+from .filters import ActiveTaskFilter, FullTextSearchFilter, TaskFilterBackend
+from .models import Task, Comment
+from .renderers import FastJSONRenderer
+from .serializers import TaskSerializer, TaskSummarySerializer, CommentSerializer
+from .views import task_prefetch
+
+CHUNK_SIZE = 500  # aiterator 每次从数据库取的行数
+FLUSH_ROWS = 100  # 每个响应块包含的行数，避免每行一次 send
+ORDERING = ('-created_at', 'id')  # 与同步列表的游标分页顺序一致
+
+renderer = FastJSONRenderer()
+
+
+def query_list(request, name):
+    value = request.GET.get(name)
+    if not value:
+        return None
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def plan(serializer_class, request, queryset):
+    """与 FieldSelectionMixin 相同：只 JOIN / 预加载 / 查询请求的字段需要的列"""
+    serializer = serializer_class(fields=query_list(request, 'fields'), expand=query_list(request, 'expand'))
+    columns, related, prefetch = serializer.get_query_plan()
+    columns += [field.lstrip('-') for field in ORDERING]
+    queryset = queryset.select_related(*related).prefetch_related(
+        *[task_prefetch(name) for name in prefetch]
+    ).only(*columns)
+    return serializer, queryset
+
+
+def limit_value(request):
+    value = request.GET.get('limit')
+    if value in (None, ''):
+        return None
+    if not value.isdigit() or int(value) < 1:
+        raise ValidationError({'limit': ['Positive Ganzzahl erwartet']})
+    return int(value)
+
+
+def not_found():
+    return JsonResponse({'detail': 'Not found.'}, status=404)
+
+
+async def stream_array(queryset, serializer):
+    """逐条序列化并输出 JSON 数组，每 FLUSH_ROWS 行发送一块；查询已经带好 select_related，序列化时不会再访问数据库"""
+    buffer, separator = [b'['], b''
+    async for obj in queryset.aiterator(chunk_size=CHUNK_SIZE):
+        buffer.append(separator + renderer.render(serializer.to_representation(obj)))
+        separator = b','
+        if len(buffer) >= FLUSH_ROWS:
+            yield b''.join(buffer)
+            buffer = []
+    buffer.append(b']')
+    yield b''.join(buffer)
+
+
+@require_GET
+async def task_list(request):
+    drf_request = Request(request)  # 复用 DRF 的过滤器，它们只读取 query_params
+    try:
+        queryset = Task.objects.all()
+        for backend in (TaskFilterBackend, ActiveTaskFilter, FullTextSearchFilter):
+            queryset = backend().filter_queryset(drf_request, queryset, None)
+        limit = limit_value(request)
+        serializer, queryset = plan(TaskSummarySerializer, request, queryset.order_by(*ORDERING))
+    except ValidationError as e:
+        return JsonResponse(e.detail, status=400)
+
+    if limit:
+        queryset = queryset[:limit]
+    return StreamingHttpResponse(stream_array(queryset, serializer), content_type='application/json')
+
+
+@require_GET
+async def task_detail(request, pk):
+    try:
+        serializer, queryset = plan(TaskSerializer, request, Task.objects.all())
+    except ValidationError as e:
+        return JsonResponse(e.detail, status=400)
+    try:
+        task = await queryset.aget(pk=pk)
+    except Task.DoesNotExist:
+        return not_found()
+    return HttpResponse(renderer.render(serializer.to_representation(task)), content_type='application/json')
+
+
+@require_GET
+async def task_comments(request, pk):
+    if not await Task.objects.filter(pk=pk).aexists():
+        return not_found()
+    try:
+        serializer, queryset = plan(CommentSerializer, request, Comment.objects.filter(task_id=pk).order_by(*ORDERING))
+    except ValidationError as e:
+        return JsonResponse(e.detail, status=400)
+    # 走 (task, -created_at) 索引，COUNT 很便宜；列表本身是流式的，客户端可据此显示进度
+    count = await queryset.acount()
+    response = StreamingHttpResponse(stream_array(queryset, serializer), content_type='application/json')
+    response['X-Total-Count'] = count
+    return response
@@ -0,0 +1,156 @@
+import hashlib
+import time
+from collections import Counter
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers, quote_etag
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+# 进程内的命中/未命中计数：{(basename, 'hit'|'miss'): n}
+metrics = Counter()
+
+
+def get_cache():
+    return caches[getattr(settings, 'API_CACHE_ALIAS', 'default')]
+
+
+def generation_key(model):
+    return f'api:generation:{model._meta.label_lower}'
+
+
+def get_generations(models):
+    """
+    读取各模型的代数（一次 get_many）
+    缺失时以当前时间初始化，即使计数被淘汰，也不会回到旧代数而命中过期的缓存
+    """
+    cache = get_cache()
+    keys = [generation_key(model) for model in models]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            cache.add(key, time.time_ns(), timeout=None)
+            generations[key] = cache.get(key)
+    return [generations[key] for key in keys]
+
+
+def bump_generation(*models):
+    """模型数据变化时调用：代数 +1，依赖它的缓存键全部失效"""
+    cache = get_cache()
+    for model in models:
+        key = generation_key(model)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+def bump_generation_on_commit(*models, using=None):
+    """
+    写操作用这个：事务提交之后才递增代数（不在事务里时立即执行）
+    提交前递增的话，并发的 GET 会在提交前读到旧数据，并以新代数缓存，直到过期都不会失效
+    """
+    transaction.on_commit(partial(bump_generation, *models), using=using)
+
+
+class CachedResponseMixin:
+    """
+    缓存 GET 列表响应的数据（序列化之后、渲染之前）
+    缓存键 = 视图 + action + 依赖模型的代数 + 完整 URL，写操作通过 signals 递增代数来失效
+    """
+    cache_models = ()  # 响应内容依赖的模型
+
+    def cache_timeout(self):
+        return getattr(settings, 'API_CACHE_TIMEOUT', 300)
+
+    def generation_tag(self):
+        return '.'.join(str(g) for g in get_generations(self.cache_models))
+
+    def cache_key(self, kind):
+        url = hashlib.md5(self.request.build_absolute_uri().encode()).hexdigest()
+        return f'api:{kind}:{self.basename}:{self.action}:{self.generation_tag()}:{url}'
+
+    def cached(self, build):
+        timeout = self.cache_timeout()
+        if not timeout:
+            return build()
+
+        key = self.cache_key('response')
+        cache = get_cache()
+        data = cache.get(key)
+        if data is not None:
+            metrics[(self.basename, 'hit')] += 1
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        metrics[(self.basename, 'miss')] += 1
+        response = build()
+        if response.status_code == 200:
+            cache.set(key, response.data, timeout)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached(lambda: super(CachedResponseMixin, self).list(request, *args, **kwargs))
+
+
+class ConditionalGetMixin(CachedResponseMixin):
+    """
+    GET 列表和详情支持 ETag，详情另外支持 Last-Modified
+    列表的验证器 = 过滤后的 Max(updated_at) + 行数，详情的验证器 = 对象自身的 updated_at
+    列表不发 Last-Modified：删除行、嵌套对象变化时 Max(updated_at) 不变，只带 If-Modified-Since 的客户端会拿到错误的 304
+    验证器和响应一样按模型代数缓存；If-None-Match 匹配时直接返回 304，不做任何序列化
+    """
+
+    def get_validators(self, queryset, detail=False):
+        queryset = queryset.prefetch_related(None).order_by()
+        if detail:
+            row = queryset.values('updated_at').first()
+            return {'last_modified': row['updated_at'] if row else None, 'count': int(row is not None)}
+        return queryset.aggregate(last_modified=Max('updated_at'), count=Count('id'))
+
+    def conditional(self, queryset, build, detail=False):
+        timeout = self.cache_timeout()
+        if timeout:
+            key = self.cache_key('validators')
+            validators = get_cache().get(key)
+            if validators is None:
+                validators = self.get_validators(queryset, detail)
+                get_cache().set(key, validators, timeout)
+        else:
+            validators = self.get_validators(queryset, detail)
+
+        last_modified = validators['last_modified']
+        # 代数也参与 ETag：嵌套的员工/评论变化时，主表的 updated_at 不一定变化；JSON 和 MessagePack 是不同的表示
+        raw = (f"{self.request.build_absolute_uri()}|{self.request.accepted_media_type}|{last_modified}|"
+               f"{validators['count']}|{self.generation_tag()}")
+        etag = quote_etag(hashlib.md5(raw.encode()).hexdigest())
+        timestamp = int(last_modified.timestamp()) if last_modified and detail else None
+
+        response = get_conditional_response(self.request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = build()
+            if response.status_code != 200:
+                return response
+        response['ETag'] = etag
+        if timestamp:
+            response['Last-Modified'] = http_date(timestamp)
+        patch_cache_control(response, no_cache=True)  # 浏览器每次都带验证器重新校验
+        patch_vary_headers(response, ('Accept',))
+        return response
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.conditional(queryset, lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.get_queryset().filter(**{self.lookup_field: self.kwargs[lookup]})
+        return self.conditional(
+            queryset, lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs), detail=True
+        )
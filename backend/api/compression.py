@@ -0,0 +1,46 @@
+"""
+响应压缩：按 Accept-Encoding 压缩超过 settings.API_COMPRESS_MIN_BYTES 的响应
+- 装了 brotli 时优先用 br（JSON 通常比 gzip 再小 15–25%），否则交给 Django 的 GZipMiddleware
+- 流式响应（导出、异步列表）总是用 gzip 逐块压缩
+- 已经带 Content-Encoding 的响应不处理；强 ETag 改成弱 ETag（编码变了，内容语义不变）
+"""
+import re
+
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # 可选依赖：没有安装时只用 gzip
+    brotli = None
+
+COMPRESS_MIN_BYTES = 1024
+BROTLI_QUALITY = 5  # 动态内容：压缩率和 CPU 的折中，11 对每个请求来说太慢
+
+re_accepts_brotli = re.compile(r'\bbr\b')
+
+
+class CompressionMiddleware(GZipMiddleware):
+    def process_response(self, request, response):
+        if not response.streaming:
+            if len(response.content) < getattr(settings, 'API_COMPRESS_MIN_BYTES', COMPRESS_MIN_BYTES):
+                return response
+            if brotli is not None and re_accepts_brotli.search(request.META.get('HTTP_ACCEPT_ENCODING', '')):
+                return self.compress_brotli(response)
+        return super().process_response(request, response)
+
+    def compress_brotli(self, response):
+        if response.has_header('Content-Encoding'):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        compressed = brotli.compress(response.content, quality=BROTLI_QUALITY)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response.headers['Content-Length'] = str(len(compressed))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        return response
@@ -0,0 +1,68 @@
+from collections import deque
+
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from .realtime import FEED_GROUP, employee_group, task_group
+
+
+class FeedConsumer(AsyncJsonWebsocketConsumer):
+    """
+    ws://.../ws/feed/                 所有 Task / Comment 变更
+    ws://.../ws/feed/?task=1,2        只订阅这些任务
+    ws://.../ws/feed/?employee=3      只订阅这个员工的任务
+    连接后也可以发送 {"action": "subscribe" | "unsubscribe", "task": 5} 或 {"action": ..., "employee": 3}
+    """
+
+    async def connect(self):
+        self.groups_joined = set()
+        self.recent = deque(maxlen=256)  # 同一事件可能经多个分组到达，按事件 id 去重
+        await self.accept()
+
+        params = self.query_params()
+        groups = [task_group(pk) for pk in params.get('task', [])]
+        groups += [employee_group(pk) for pk in params.get('employee', [])]
+        for group in groups or [FEED_GROUP]:
+            await self.join(group)
+
+    async def disconnect(self, code):
+        for group in list(self.groups_joined):
+            await self.channel_layer.group_discard(group, self.channel_name)
+
+    def query_params(self):
+        params = {}
+        query = self.scope.get('query_string', b'').decode()
+        for pair in filter(None, query.split('&')):
+            name, _, value = pair.partition('=')
+            params.setdefault(name, []).extend(int(pk) for pk in value.split(',') if pk.isdigit())
+        return params
+
+    async def join(self, group):
+        if group not in self.groups_joined:
+            await self.channel_layer.group_add(group, self.channel_name)
+            self.groups_joined.add(group)
+
+    async def leave(self, group):
+        if group in self.groups_joined:
+            await self.channel_layer.group_discard(group, self.channel_name)
+            self.groups_joined.discard(group)
+
+    async def receive_json(self, content, **kwargs):
+        action = content.get('action')
+        if action not in ('subscribe', 'unsubscribe'):
+            await self.send_json({'error': 'unknown action'})
+            return
+        groups = []
+        if isinstance(content.get('task'), int):
+            groups.append(task_group(content['task']))
+        if isinstance(content.get('employee'), int):
+            groups.append(employee_group(content['employee']))
+        for group in groups:
+            await (self.join(group) if action == 'subscribe' else self.leave(group))
+        await self.send_json({'subscribed': sorted(self.groups_joined)})
+
+    async def feed_event(self, message):
+        event = message['event']
+        if event['id'] in self.recent:
+            return
+        self.recent.append(event['id'])
+        await self.send_json(event)
@@ -0,0 +1,132 @@
+"""
+流式导出：逐块读取（iterator + 每块一次预加载），逐行编码，内存占用与表大小无关
+导出的字段与 import_data 读取的字段一致，导出的文件可以直接再导入
+"""
+import csv
+import datetime
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch
+
+from .models import Task, Employee, Comment
+
+EXPORT_CHUNK_SIZE = 2000  # 每次从数据库读取的行数（也是每次预加载评论的任务数）
+FLUSH_ROWS = 200  # 每个输出块包含的行数
+
+TASK_FIELDS = [
+    'id', 'title', 'description', 'status', 'priority', 'start_date', 'end_date',
+    'employee_id', 'tester_id', 'created_by_id', 'updated_by_id', 'version', 'created_at', 'updated_at',
+]
+TASK_COMMENT_FIELDS = ['id', 'author_id', 'text', 'is_edited', 'created_at', 'updated_at']
+EMPLOYEE_FIELDS = ['id', 'firstname', 'lastname', 'role', 'department', 'is_active']
+# import_data 读取的评论键是 task / author
+COMMENT_FIELDS = {'id': 'id', 'task': 'task_id', 'author': 'author_id', 'text': 'text',
+                  'is_edited': 'is_edited', 'created_at': 'created_at'}
+
+
+def export_tasks(queryset=None, comments=True, chunk_size=EXPORT_CHUNK_SIZE):
+    """任务按 id 顺序导出；comments=True 时每个任务带上它的评论列表"""
+    queryset = (Task.objects.all() if queryset is None else queryset).order_by('id').only(*TASK_FIELDS)
+    if comments:
+        queryset = queryset.prefetch_related(Prefetch(
+            'comments',
+            queryset=Comment.objects.only('task_id', *TASK_COMMENT_FIELDS).order_by('created_at', 'id'),
+        ))
+    for task in queryset.iterator(chunk_size=chunk_size):
+        row = {name: getattr(task, name) for name in TASK_FIELDS}
+        if comments:
+            row['comments'] = [
+                {name: getattr(comment, name) for name in TASK_COMMENT_FIELDS} for comment in task.comments.all()
+            ]
+        yield row
+
+
+def export_employees(chunk_size=EXPORT_CHUNK_SIZE):
+    yield from Employee.objects.order_by('id').values(*EMPLOYEE_FIELDS).iterator(chunk_size=chunk_size)
+
+
+def export_comments(chunk_size=EXPORT_CHUNK_SIZE):
+    rows = Comment.objects.order_by('id').values_list(*COMMENT_FIELDS.values()).iterator(chunk_size=chunk_size)
+    for values in rows:
+        yield dict(zip(COMMENT_FIELDS, values))
+
+
+# ---------- 编码 ----------
+
+def to_json(value):
+    return json.dumps(value, cls=DjangoJSONEncoder, ensure_ascii=False)
+
+
+def csv_cell(value):
+    if value is None:
+        return ''
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, (list, dict)):
+        return to_json(value)  # 嵌套的评论以 JSON 写在一个单元格里
+    return value
+
+
+class Echo:
+    """csv.writer 的“文件”：writerow 直接返回编码好的一行"""
+    def write(self, value):
+        return value
+
+
+def flushed(lines):
+    """把多行合并成一块输出，减少 StreamingHttpResponse / 文件写入的次数"""
+    buffer = []
+    for line in lines:
+        buffer.append(line)
+        if len(buffer) >= FLUSH_ROWS:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+def ndjson_lines(rows):
+    return flushed(to_json(row) + '\n' for row in rows)
+
+
+def json_array_lines(rows):
+    def lines():
+        yield '['
+        separator = '\n'
+        for row in rows:
+            yield separator + to_json(row)
+            separator = ',\n'
+        yield '\n]\n'
+    return flushed(lines())
+
+
+def csv_lines(rows, fields):
+    writer = csv.writer(Echo())
+
+    def lines():
+        yield writer.writerow(fields)
+        for row in rows:
+            yield writer.writerow([csv_cell(row.get(name)) for name in fields])
+    return flushed(lines())
+
+
+async def async_chunks(chunks):
+    """
+    ASGI 下把同步的块生成器交给 StreamingHttpResponse：同步迭代器会被 sync_to_async(list) 整个读进内存再发送
+    每块都在同一个线程里生成（thread_sensitive），数据库游标不会跨线程使用
+    """
+    end = object()
+    next_chunk = sync_to_async(next)
+    while (chunk := await next_chunk(chunks, end)) is not end:
+        yield chunk
+
+
+def encode(rows, file_format, fields):
+    """按格式编码为文本块；fields 是 CSV 的列"""
+    if file_format == 'csv':
+        return csv_lines(rows, fields)
+    if file_format == 'ndjson':
+        return ndjson_lines(rows)
+    return json_array_lines(rows)
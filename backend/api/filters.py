@@ -0,0 +1,164 @@
+import datetime
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
+
+from .models import ARCHIVED_STATUS, PRIORITY_RANK, STATUS_BY_KEY
+from .search import filter_matching
+
+
+def split_values(value):
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def choice_list(keys):
+    """逗号分隔的多个取值，必须在 choices 之内"""
+    def parse(value):
+        values = split_values(value)
+        invalid = [item for item in values if item not in keys]
+        if invalid:
+            raise ValueError(f"Ungültiger Wert: {', '.join(invalid)}")
+        return values
+    return parse
+
+
+def id_list(value):
+    try:
+        return [int(item) for item in split_values(value)]
+    except ValueError:
+        raise ValueError('Nur numerische IDs erlaubt')
+
+
+def date_value(value):
+    parsed = parse_date(value)  # 格式正确但日期无效时本身就会抛 ValueError
+    if parsed is None:
+        raise ValueError('Datum im Format JJJJ-MM-TT erwartet')
+    return parsed
+
+
+def start_of_day(value):
+    """日期参数用于 DateTimeField：当天 0 点（当前时区）"""
+    return timezone.make_aware(datetime.datetime.combine(date_value(value), datetime.time.min))
+
+
+def count_value(value):
+    if not value.isdigit():
+        raise ValueError('Nicht-negative Ganzzahl erwartet')
+    return int(value)
+
+
+def boolean(value):
+    if value.lower() in ('true', '1'):
+        return True
+    if value.lower() in ('false', '0'):
+        return False
+    raise ValueError('true oder false erwartet')
+
+
+class TaskFilterBackend(BaseFilterBackend):
+    """
+    /api/tasks/ 的声明式过滤，例如 ?status=offen,abgeschlossen&priority=high&employee=3&overdue=true
+    lookup 的选择对应 Task 上的组合索引：(status, priority)、(employee, status)、(start_date, end_date)
+    """
+    # 参数名 -> (ORM lookup, 解析函数)
+    filters = {
+        'status': ('status__in', choice_list(STATUS_BY_KEY)),
+        'priority': ('priority__in', choice_list(PRIORITY_RANK)),
+        'employee': ('employee_id__in', id_list),
+        'tester': ('tester_id__in', id_list),
+        'created_by': ('created_by_id__in', id_list),
+        'department': ('employee__department', str),  # Task 本身没有部门，通过负责人过滤
+        'start_date_from': ('start_date__gte', date_value),
+        'start_date_to': ('start_date__lte', date_value),
+        'end_date_from': ('end_date__gte', date_value),
+        'end_date_to': ('end_date__lte', date_value),
+        # 冗余的评论统计（comment_count / last_comment_at），不需要 JOIN 评论表
+        'min_comments': ('comment_count__gte', count_value),
+        'commented_since': ('last_comment_at__gte', start_of_day),
+    }
+    # 参数名 -> (TaskQuerySet 方法, 解析函数)，用于不能写成单个 lookup 的条件
+    method_filters = {
+        'overdue': ('overdue', boolean),
+    }
+
+    def parse(self, request, declared):
+        values, errors = {}, {}
+        for param, (target, parse) in declared.items():
+            value = request.query_params.get(param)
+            if value in (None, ''):
+                continue
+            try:
+                values[target] = parse(value)
+            except ValueError as e:
+                errors[param] = [str(e)]
+        return values, errors
+
+    def filter_queryset(self, request, queryset, view):
+        lookups, errors = self.parse(request, self.filters)
+        methods, method_errors = self.parse(request, self.method_filters)
+        errors.update(method_errors)
+        if errors:
+            raise ValidationError(errors)
+
+        queryset = queryset.filter(**lookups)
+        for method, value in methods.items():
+            queryset = getattr(queryset, method)(value)
+        return queryset
+
+
+class ActiveTaskFilter(BaseFilterBackend):
+    """
+    任务列表默认不含已归档（archiviert）的任务，查询走部分索引 api_task_active_created_idx
+    ?include_archived=true 或明确 ?status=archiviert（/api/tasks/status/archiviert/）时包含；详情、统计、导出不受影响
+    已经移到归档表的任务见 /api/archive/tasks/
+    """
+    actions = ('list', 'list_by_status', 'list_by_department')
+
+    def filter_queryset(self, request, queryset, view):
+        if getattr(view, 'action', 'list') not in self.actions:  # 异步视图没有 view，视为列表
+            return queryset
+        value = request.query_params.get('include_archived')
+        try:
+            include = boolean(value) if value else False
+        except ValueError as e:
+            raise ValidationError({'include_archived': [str(e)]})
+        statuses = split_values(request.query_params.get('status', ''))
+        if view is not None and 'status' in view.kwargs:
+            statuses.append(view.kwargs['status'])
+        if include or ARCHIVED_STATUS in statuses:
+            return queryset
+        return queryset.active()
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """?q=... 全文检索（走 FTS5 / GIN 索引），与 SearchFilter 的 LIKE '%...%' 不同"""
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get('q', '').strip()
+        if not text:
+            return queryset
+        return filter_matching(queryset, text)
+
+
+class TaskOrderingFilter(OrderingFilter):
+    """
+    ?ordering=priority 按数字等级（priority_rank 列）排序，而不是按字符串
+    用户指定的排序后面总是补上 -created_at, id：priority / status 等列大量重复，
+    没有唯一的次序时游标分页会在页之间重复或漏掉记录；(-priority_rank, -created_at) 索引也正好覆盖这个排序
+    """
+    aliases = {'priority': 'priority_rank'}
+    tiebreakers = ('-created_at', 'id')
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering:
+            return ordering
+        ordering = [self.resolve(term) for term in ordering]
+        names = {term.lstrip('-') for term in ordering}
+        return ordering + [term for term in self.tiebreakers if term.lstrip('-') not in names]
+
+    def resolve(self, term):
+        prefix = '-' if term.startswith('-') else ''
+        return prefix + self.aliases.get(term.lstrip('-'), term.lstrip('-'))
@@ -0,0 +1,203 @@
+"""
+后台任务：Job 表就是队列，不需要 Redis / Celery 之类的外部服务
+- POST /api/jobs/ 只写入一行 queued 的 Job 并立刻返回 202，由命令 run_jobs 领取执行
+- 领取用条件 UPDATE（queued → running），多个 worker 同时运行也不会重复执行同一个任务
+- 执行中按时间间隔写进度（processed / total），同时作为心跳；任务被取消后下一次写进度失败，任务随即停止
+- run_jobs --processes N：每个任务在子进程里执行，CPU 密集的解析 / 编码不受 GIL 限制，也不阻塞 worker 主循环
+"""
+import io
+import logging
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import Max, Min
+from django.http import HttpRequest, QueryDict
+from django.utils import timezone
+from rest_framework.request import Request
+
+from .cache import bump_generation_on_commit
+from .export import EXPORT_CHUNK_SIZE, TASK_FIELDS, encode, export_tasks
+from .filters import FullTextSearchFilter, TaskFilterBackend
+from .models import (
+    Employee, Job, Task,
+    JOB_CANCELLED, JOB_FAILED, JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED,
+)
+from .workload import rebuild_workload
+
+logger = logging.getLogger('api.jobs')
+
+PROGRESS_INTERVAL = 1.0  # 秒：两次写进度之间至少间隔这么久
+STATS_BATCH_SIZE = 1000  # 重建评论统计时每条 UPDATE 覆盖的任务 ID 范围
+
+handlers = {}
+
+
+def job_handler(kind):
+    """注册任务类型：handler(job, progress) 返回可以 JSON 序列化的结果"""
+    def register(func):
+        handlers[kind] = func
+        return func
+    return register
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Progress:
+    def __init__(self, job, interval=PROGRESS_INTERVAL):
+        self.job_id = job.pk
+        self.interval = interval
+        self.processed = 0
+        self.total = None
+        self.flushed_at = time.monotonic()
+
+    def set_total(self, total):
+        self.total = total
+        self.flush()
+
+    def advance(self, count=1):
+        self.processed += count
+        if time.monotonic() - self.flushed_at >= self.interval:
+            self.flush()
+
+    def track(self, iterable):
+        for item in iterable:
+            yield item
+            self.advance()
+
+    def flush(self):
+        self.flushed_at = time.monotonic()
+        updated = Job.objects.filter(id=self.job_id, status=JOB_RUNNING).update(
+            processed=self.processed, total=self.total, updated_at=timezone.now(),
+        )
+        if not updated:
+            raise JobCancelled
+
+
+# ---------- 队列 ----------
+
+def claim(worker):
+    """领取最早提交的排队任务，返回它的 ID；没有时返回 None"""
+    for pk in Job.objects.filter(status=JOB_QUEUED).order_by('id').values_list('id', flat=True)[:10]:
+        now = timezone.now()
+        # 条件 UPDATE：别的 worker 先领走时影响 0 行，换下一个
+        if Job.objects.filter(id=pk, status=JOB_QUEUED).update(
+            status=JOB_RUNNING, worker=worker, started_at=now, updated_at=now,
+        ):
+            return pk
+    return None
+
+
+def finish(pk, status, **values):
+    return Job.objects.filter(id=pk, status=JOB_RUNNING).update(
+        status=status, finished_at=timezone.now(), updated_at=timezone.now(), **values,
+    )
+
+
+def run_job(pk):
+    """执行一个已领取的任务（在 worker 进程或进程池的子进程里），返回最终状态"""
+    job = Job.objects.get(pk=pk)
+    progress = Progress(job)
+    try:
+        result = handlers[job.kind](job, progress)
+    except JobCancelled:
+        return JOB_CANCELLED
+    except Exception as exc:
+        logger.exception('job %s (%s) failed', pk, job.kind)
+        finish(pk, JOB_FAILED, processed=progress.processed, error=f'{type(exc).__name__}: {exc}')
+        return JOB_FAILED
+    if not finish(pk, JOB_SUCCEEDED, processed=progress.processed, total=progress.total, result=result):
+        return JOB_CANCELLED  # 最后一段执行期间被取消
+    return JOB_SUCCEEDED
+
+
+def cancel(job):
+    """排队中的任务不再执行；执行中的任务在下一次写进度时停止（已提交的批次不回滚）"""
+    return Job.objects.filter(id=job.pk, status__in=[JOB_QUEUED, JOB_RUNNING]).update(
+        status=JOB_CANCELLED, finished_at=timezone.now(), updated_at=timezone.now(),
+    )
+
+
+def requeue_stale(seconds):
+    """心跳超时的任务（worker 进程被杀掉等）重新排队"""
+    cutoff = timezone.now() - timedelta(seconds=seconds)
+    return Job.objects.filter(status=JOB_RUNNING, updated_at__lt=cutoff).update(
+        status=JOB_QUEUED, worker='', started_at=None, processed=0,
+    )
+
+
+def job_file(job):
+    return Path(settings.JOB_FILES_DIR) / f"job-{job.pk}.{job.params['format']}"
+
+
+# ---------- 任务类型 ----------
+
+def filtered_tasks(filters):
+    """按 /api/tasks/ 的过滤参数筛选任务；参数无效时抛出 ValidationError（提交时就校验）"""
+    http_request = HttpRequest()
+    http_request.GET = QueryDict(mutable=True)
+    for name, value in (filters or {}).items():
+        http_request.GET[name] = str(value)
+    request = Request(http_request)
+    queryset = Task.objects.all()
+    for backend in (TaskFilterBackend, FullTextSearchFilter):
+        queryset = backend().filter_queryset(request, queryset, None)
+    return queryset
+
+
+@job_handler('import')
+def import_job(job, progress):
+    """params: {"model": "task" | "employee" | "comment", "rows": [...]}，格式与 import_data 读取的文件相同"""
+    from .management.commands.import_data import Command as ImportCommand
+
+    rows, model = job.params['rows'], job.params['model']
+    command = ImportCommand(stdout=io.StringIO())
+    command.batch_size = job.params.get('batch_size', 1000)
+    command.dry_run = False
+    command.started = time.perf_counter()
+    progress.set_total(len(rows))
+    importer = {'employee': command.import_employees, 'task': command.import_tasks,
+                'comment': command.import_comments}[model]
+    imported = importer(progress.track(rows))
+    return {'model': model, 'rows': len(rows), 'imported': imported}
+
+
+@job_handler('export')
+def export_job(job, progress):
+    """params: {"format": "csv" | "ndjson" | "json", "comments": true, "filters": {...}}，结果文件由 download 接口下载"""
+    params = job.params
+    queryset = filtered_tasks(params.get('filters'))
+    comments = params.get('comments', True)
+    fields = TASK_FIELDS + (['comments'] if comments else [])
+    progress.set_total(queryset.count())
+
+    path = job_file(job)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            rows = progress.track(export_tasks(queryset, comments, EXPORT_CHUNK_SIZE))
+            for chunk in encode(rows, params['format'], fields):
+                f.write(chunk)
+    except Exception:
+        path.unlink(missing_ok=True)  # 取消或失败时不留下写了一半的文件
+        raise
+    return {'rows': progress.processed, 'bytes': path.stat().st_size, 'format': params['format']}
+
+
+@job_handler('rebuild_stats')
+def rebuild_stats_job(job, progress):
+    """按 ID 范围分批重新计算任务的评论统计，再重建员工工作量汇总表"""
+    bounds = Task.objects.aggregate(low=Min('id'), high=Max('id'))
+    progress.set_total(Task.objects.count())
+    tasks = 0
+    if bounds['low'] is not None:
+        for start in range(bounds['low'], bounds['high'] + 1, STATS_BATCH_SIZE):
+            updated = Task.objects.filter(id__range=(start, start + STATS_BATCH_SIZE - 1)).refresh_comment_stats()
+            tasks += updated
+            progress.advance(updated)
+    employees = rebuild_workload()
+    bump_generation_on_commit(Task, Employee)  # update() / bulk_create 不发送 signal
+    return {'tasks': tasks, 'employees': employees}
@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.archive import ARCHIVE_BATCH_SIZE, archivable, archive_tasks, expired, purge_archive, restore_tasks
+from api.models import ArchivedTask
+
+
+class Command(BaseCommand):
+    help = 'Move archived tasks past their retention period (and their comments) into the archive tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, default=settings.ARCHIVE_AFTER_DAYS,
+                            help='days since an archived task was last changed (default: ARCHIVE_AFTER_DAYS)')
+        parser.add_argument('--purge-after', type=int, default=settings.ARCHIVE_PURGE_AFTER_DAYS,
+                            help='delete archive rows older than this many days, 0: keep forever '
+                                 '(default: ARCHIVE_PURGE_AFTER_DAYS)')
+        parser.add_argument('--batch-size', type=int, default=ARCHIVE_BATCH_SIZE, help='tasks per transaction')
+        parser.add_argument('--limit', type=int, help='move at most this many tasks in this run')
+        parser.add_argument('--sleep', type=float, default=0, help='seconds to pause between batches')
+        parser.add_argument('--dry-run', action='store_true', help='only count what would be moved / purged')
+        parser.add_argument('--restore', type=int, nargs='+', metavar='ID', help='move these tasks back instead')
+
+    def handle(self, *args, **kwargs):
+        if kwargs['restore']:
+            restored = restore_tasks(kwargs['restore'])
+            self.stdout.write(self.style.SUCCESS(f'restored {restored} tasks'))
+            return
+        if kwargs['older_than'] < 0 or kwargs['purge_after'] < 0:
+            raise CommandError('retention periods must not be negative')
+
+        if kwargs['dry_run']:
+            self.stdout.write(f"{archivable(kwargs['older_than']).count()} tasks would be archived")
+            if kwargs['purge_after']:
+                self.stdout.write(f"{expired(kwargs['purge_after']).count()} tasks would be purged from the archive")
+            return
+
+        tasks, comments = archive_tasks(
+            kwargs['older_than'], batch_size=kwargs['batch_size'], limit=kwargs['limit'], pause=kwargs['sleep'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'archived {tasks} tasks and {comments} comments'))
+        if kwargs['purge_after']:
+            purged = purge_archive(kwargs['purge_after'], batch_size=kwargs['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f'purged {purged} tasks from the archive ({ArchivedTask.objects.count()} left)'
+            ))
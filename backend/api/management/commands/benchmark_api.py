@@ -0,0 +1,215 @@
+import json
+import platform
+import random
+import statistics
+import subprocess
+import time
+from contextlib import nullcontext
+from datetime import date, timedelta
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max, Min
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+from api.models import Comment, Employee, Task
+
+DEFAULT_MAX_REGRESSION = 0.2  # p50 变慢超过 20% 视为回归
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the key REST endpoints against the current database (see generate_data) and record JSON results'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50, help='measured requests per endpoint')
+        parser.add_argument('--warmup', type=int, default=5, help='unmeasured requests per endpoint')
+        parser.add_argument('--page-size', type=int, default=100, help='rows per list response')
+        parser.add_argument('--bulk-size', type=int, default=500, help='tasks per bulk import request')
+        parser.add_argument('--only', help='comma separated endpoint names')
+        parser.add_argument('--seed', type=int, default=42, help='random seed for picking tasks')
+        parser.add_argument('--with-cache', action='store_true', help='keep the response cache enabled')
+        parser.add_argument('--output', help='write the results to this JSON file')
+        parser.add_argument('--compare', help='earlier results (JSON) to compare against')
+        parser.add_argument('--max-regression', type=float, default=DEFAULT_MAX_REGRESSION,
+                            help='fail when p50 gets slower by more than this fraction (with --compare)')
+
+    def handle(self, *args, **kwargs):
+        if not Task.objects.exists() or not Employee.objects.exists():
+            raise CommandError('no data, run generate_data first')
+        self.rng = random.Random(kwargs['seed'])
+        # DEBUG 时 ALLOWED_HOSTS 为空也允许 localhost
+        host = next((name.lstrip('.') for name in settings.ALLOWED_HOSTS if name != '*'), 'localhost')
+        self.client = Client(HTTP_HOST=host)
+        iterations, warmup = kwargs['iterations'], kwargs['warmup']
+        if iterations < 1:
+            raise CommandError('--iterations must be positive')
+
+        endpoints = self.endpoints(kwargs['page_size'], kwargs['bulk_size'], iterations + warmup)
+        if kwargs['only']:
+            names = set(kwargs['only'].split(','))
+            endpoints = [endpoint for endpoint in endpoints if endpoint['name'] in names]
+
+        # 默认关闭响应缓存，测的是查询 + 序列化 + 渲染本身
+        overrides = {} if kwargs['with_cache'] else {'API_CACHE_TIMEOUT': 0}
+        results = []
+        with override_settings(**overrides):
+            for endpoint in endpoints:
+                results.append(self.run(endpoint, iterations, warmup))
+
+        report = {'meta': self.meta(kwargs), 'results': results}
+        self.print_table(results)
+        if kwargs['output']:
+            with open(kwargs['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+        if kwargs['compare']:
+            self.compare(kwargs['compare'], results, kwargs['max_regression'])
+
+    # ---------- 要测的接口 ----------
+
+    def sample_tasks(self, count, **filters):
+        """在 ID 范围内随机取存在的任务（不用 ORDER BY RANDOM()，百万行也很快）"""
+        queryset = Task.objects.filter(**filters)
+        bounds = queryset.aggregate(low=Min('id'), high=Max('id'))
+        if bounds['low'] is None:
+            queryset, bounds = Task.objects.all(), Task.objects.aggregate(low=Min('id'), high=Max('id'))
+        candidates = [self.rng.randint(bounds['low'], bounds['high']) for _ in range(count * 4)]
+        ids = sorted(set(queryset.filter(id__in=candidates).values_list('id', flat=True)))
+        ids = ids or list(queryset.values_list('id', flat=True)[:1])
+        return [ids[i % len(ids)] for i in range(count)]
+
+    def endpoints(self, page_size, bulk_size, count):
+        tasks = self.sample_tasks(count)
+        commented = self.sample_tasks(count, comment_count__gt=0)
+        employee = Employee.objects.values_list('id', flat=True).first()
+
+        def task_payload(i):
+            start = date.today() + timedelta(days=i % 30)
+            return {
+                'title': f'Benchmark {i}', 'description': 'benchmark', 'status': 'offen', 'priority': 'high',
+                'start_date': start.isoformat(), 'end_date': (start + timedelta(days=7)).isoformat(),
+                'employee_id': employee,
+            }
+
+        return [
+            {'name': 'task_list', 'method': 'get', 'url': lambda i: f'/api/tasks/?page_size={page_size}'},
+            {'name': 'status_filter', 'method': 'get',
+             'url': lambda i: f'/api/tasks/?status=offen&page_size={page_size}'},
+            {'name': 'comments_by_task', 'method': 'get',
+             'url': lambda i: f'/api/comments/?task_id={commented[i]}&page_size={page_size}'},
+            {'name': 'task_detail', 'method': 'get', 'url': lambda i: f'/api/tasks/{tasks[i]}/'},
+            {'name': 'task_create', 'method': 'post', 'url': lambda i: '/api/tasks/',
+             'payload': task_payload, 'write': True},
+            {'name': 'bulk_import', 'method': 'post', 'url': lambda i: '/api/tasks/bulk/',
+             'payload': lambda i: [task_payload(i * bulk_size + n) for n in range(bulk_size)], 'write': True,
+             'rows': bulk_size},
+        ]
+
+    def request(self, endpoint, i):
+        send = getattr(self.client, endpoint['method'])
+        url = endpoint['url'](i)
+        if 'payload' in endpoint:
+            return send(url, endpoint['payload'](i), content_type='application/json')
+        return send(url)
+
+    def run(self, endpoint, iterations, warmup):
+        latencies, queries, size = [], 0, 0
+        for i in range(warmup + iterations):
+            # 写接口在回滚的事务里执行，数据集保持不变，每次测量条件相同
+            with transaction.atomic() if endpoint.get('write') else nullcontext():
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    response = self.request(endpoint, i)
+                    elapsed = time.perf_counter() - started
+                if endpoint.get('write'):
+                    transaction.set_rollback(True)
+            if response.status_code >= 400:
+                raise CommandError(f"{endpoint['name']}: HTTP {response.status_code} {response.content[:200]!r}")
+            if i >= warmup:
+                latencies.append(elapsed)
+                queries, size = len(captured), len(response.content)
+
+        total = sum(latencies)
+        result = {
+            'name': endpoint['name'],
+            'method': endpoint['method'].upper(),
+            'url': endpoint['url'](warmup),
+            'iterations': iterations,
+            'mean_ms': statistics.mean(latencies) * 1000,
+            'p50_ms': statistics.median(latencies) * 1000,
+            'p95_ms': percentile(latencies, 0.95) * 1000,
+            'p99_ms': percentile(latencies, 0.99) * 1000,
+            'rps': iterations / total if total else None,
+            'queries': queries,
+            'bytes': size,
+        }
+        if 'rows' in endpoint:
+            result['rows_per_s'] = endpoint['rows'] * iterations / total if total else None
+        return result
+
+    # ---------- 输出 ----------
+
+    def meta(self, kwargs):
+        return {
+            'commit': git_commit(),
+            'timestamp': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'dataset': {
+                'employees': Employee.objects.count(),
+                'tasks': Task.objects.count(),
+                'comments': Comment.objects.count(),
+            },
+            'options': {name: kwargs[name] for name in ('iterations', 'warmup', 'page_size', 'bulk_size', 'with_cache')},
+        }
+
+    def print_table(self, results):
+        self.stdout.write(
+            f"{'endpoint':<18}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>9}{'queries':>9}{'bytes':>10}"
+        )
+        for row in results:
+            self.stdout.write(
+                f"{row['name']:<18}{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}"
+                f"{row['rps']:>9.1f}{row['queries']:>9}{row['bytes']:>10}"
+            )
+
+    def compare(self, path, results, max_regression):
+        """与之前的结果比较：p50 变慢超过阈值或查询条数增加都算回归"""
+        with open(path, encoding='utf-8') as f:
+            baseline = {row['name']: row for row in json.load(f)['results']}
+        regressions = []
+        self.stdout.write(f"\n{'endpoint':<18}{'p50 before':>12}{'p50 now':>10}{'change':>9}{'queries':>10}")
+        for row in results:
+            old = baseline.get(row['name'])
+            if old is None:
+                continue
+            change = row['p50_ms'] / old['p50_ms'] - 1 if old['p50_ms'] else 0
+            self.stdout.write(
+                f"{row['name']:<18}{old['p50_ms']:>12.1f}{row['p50_ms']:>10.1f}{change:>+9.0%}"
+                f"{old['queries']:>5} → {row['queries']}"
+            )
+            if change > max_regression:
+                regressions.append(f"{row['name']}: p50 {change:+.0%}")
+            if row['queries'] > old['queries']:
+                regressions.append(f"{row['name']}: queries {old['queries']} → {row['queries']}")
+        if regressions:
+            raise CommandError('performance regression: ' + '; '.join(regressions))
+        self.stdout.write(self.style.SUCCESS('no regressions'))
@@ -0,0 +1,69 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.export import (
+    COMMENT_FIELDS, EMPLOYEE_FIELDS, EXPORT_CHUNK_SIZE, TASK_FIELDS,
+    encode, export_comments, export_employees, export_tasks,
+)
+
+
+class Command(BaseCommand):
+    help = 'export Data to JSON / NDJSON / CSV files (the counterpart of import_data)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', type=str, help='output file, "-" for stdout')
+        parser.add_argument('--model', choices=['task', 'employee', 'comment'], default='task')
+        parser.add_argument('--format', choices=['auto', 'json', 'ndjson', 'csv'], default='auto',
+                            help='auto: by file extension (.ndjson/.jsonl, .csv, otherwise json)')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE, help='rows read per query')
+        parser.add_argument('--no-comments', action='store_true', help='tasks only, without their comments')
+
+    def handle(self, *args, **kwargs):
+        output, model = kwargs['output'], kwargs['model']
+        chunk_size = kwargs['chunk_size']
+
+        file_format = kwargs['format']
+        if file_format == 'auto':
+            name = output.lower()
+            if name.endswith(('.ndjson', '.jsonl')):
+                file_format = 'ndjson'
+            elif name.endswith('.csv'):
+                file_format = 'csv'
+            else:
+                file_format = 'json'
+
+        # 与 import_data 的格式对应：任务、员工、评论分别导出到各自的文件
+        if model == 'task':
+            comments = not kwargs['no_comments']
+            rows = export_tasks(comments=comments, chunk_size=chunk_size)
+            fields = TASK_FIELDS + (['comments'] if comments else [])
+        elif model == 'employee':
+            rows, fields = export_employees(chunk_size), EMPLOYEE_FIELDS
+        else:
+            rows, fields = export_comments(chunk_size), list(COMMENT_FIELDS)
+
+        count = 0
+
+        def counted(rows):
+            nonlocal count
+            for row in rows:
+                count += 1
+                yield row
+
+        started = time.perf_counter()
+        f = sys.stdout if output == '-' else open(output, 'w', encoding='utf-8', newline='')
+        try:
+            for chunk in encode(counted(rows), file_format, fields):
+                f.write(chunk)
+        finally:
+            if f is not sys.stdout:
+                f.close()
+
+        elapsed = time.perf_counter() - started
+        rate = count / elapsed if elapsed > 0 else 0
+        # 写到 stdout 时统计信息输出到 stderr，不污染导出内容
+        log = self.stderr if output == '-' else self.stdout
+        log.write(self.style.SUCCESS(f'exported {count} {model}s'))
+        log.write(f'{count} rows in {elapsed:.2f}s ({rate:.0f} rows/s)')
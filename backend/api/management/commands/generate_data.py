@@ -0,0 +1,134 @@
+import random
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from api.cache import bump_generation_on_commit
+from api.models import Comment, Employee, EmployeeWorkload, PRIORITY_CHOICES, Task
+from api.workload import rebuild_workload
+
+# 数据规模 = 任务数；员工数和评论数按比例生成
+SCALES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+TASKS_PER_EMPLOYEE = 50
+MAX_COMMENTS_PER_TASK = 6  # 每个任务 0–6 条评论，平均 3 条
+
+FIRSTNAMES = ['Anna', 'Ben', 'Clara', 'David', 'Elena', 'Felix', 'Greta', 'Hannah', 'Jonas', 'Lena',
+              'Lukas', 'Marie', 'Noah', 'Paul', 'Sophie', 'Tim', 'Wei', 'Yusuf', 'Zoe', 'Mia']
+LASTNAMES = ['Schmidt', 'Müller', 'Meier', 'Wagner', 'Becker', 'Hoffmann', 'Koch', 'Richter', 'Klein',
+             'Wolf', 'Neumann', 'Schwarz', 'Zhang', 'Li', 'Yilmaz', 'Fischer', 'Weber', 'Braun']
+DEPARTMENTS = ['IT', 'Marketing', 'Vertrieb', 'Finanzen', 'Personal', 'Einkauf', 'Support', 'Recht']
+VERBS = ['Implementieren', 'Testen', 'Prüfen', 'Dokumentieren', 'Migrieren', 'Optimieren', 'Planen',
+         'Überarbeiten', 'Abstimmen', 'Bereitstellen']
+NOUNS = ['Login', 'Rechnungsexport', 'Website', 'Newsletter', 'Datenbank', 'Suche', 'Dashboard',
+         'Schnittstelle', 'Berichte', 'Onboarding', 'Zahlungsmodul', 'Benachrichtigungen']
+WORDS = ['bitte', 'dringend', 'Kunde', 'Fehler', 'Termin', 'Review', 'Version', 'Daten', 'Server',
+         'Freigabe', 'Entwurf', 'Abnahme', 'Feedback', 'Ticket', 'Budget', 'Team', 'nächste', 'Woche']
+# 状态分布：大部分已完成或进行中
+STATUS_WEIGHTS = {'nicht_zugewiesen': 10, 'offen': 35, 'abgeschlossen': 45, 'archiviert': 10}
+ROLE_WEIGHTS = {'admin': 2, 'manager': 10, 'staff': 88}
+
+
+class Command(BaseCommand):
+    help = 'Generate reproducible synthetic employees, tasks and comments for benchmarks (10k / 100k / 1m tasks)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=SCALES, default='10k', help='number of tasks')
+        parser.add_argument('--tasks', type=int, help='exact number of tasks (overrides --scale)')
+        parser.add_argument('--seed', type=int, default=42, help='random seed, same seed gives the same data')
+        parser.add_argument('--batch-size', type=int, default=5000, help='tasks per bulk write / transaction')
+        parser.add_argument('--clear', action='store_true', help='delete all employees, tasks and comments first')
+
+    def handle(self, *args, **kwargs):
+        tasks = kwargs['tasks'] or SCALES[kwargs['scale']]
+        if tasks < 1:
+            raise CommandError('--tasks must be positive')
+        # 任务和评论各用一个随机数序列，生成的数据与 --batch-size 无关
+        self.rng = random.Random(kwargs['seed'])
+        self.comment_rng = random.Random(kwargs['seed'] + 1)
+        batch_size = kwargs['batch_size']
+        started = time.perf_counter()
+
+        if kwargs['clear']:
+            self.clear()
+
+        employee_ids = self.create_employees(max(10, tasks // TASKS_PER_EMPLOYEE))
+        created = comments = 0
+        while created < tasks:
+            size = min(batch_size, tasks - created)
+            comments += self.create_tasks(created, size, employee_ids)
+            created += size
+            self.stdout.write(f'{created}/{tasks} tasks', ending='\r')
+        self.stdout.write('')
+
+        # bulk_create 不发送 signal：汇总表一次重建，缓存一次失效
+        rebuild_workload()
+        bump_generation_on_commit(Employee, Task, Comment)
+
+        rows = len(employee_ids) + tasks + comments
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'generated {len(employee_ids)} employees, {tasks} tasks, {comments} comments '
+            f'in {elapsed:.1f}s ({rows / elapsed:.0f} rows/s)'
+        ))
+
+    def clear(self):
+        # 直接 DELETE，不逐条加载对象发送 signal（全文检索索引由触发器同步）
+        with transaction.atomic(), connection.cursor() as cursor:
+            for model in (Comment, Task, EmployeeWorkload, Employee):
+                cursor.execute(f'DELETE FROM {connection.ops.quote_name(model._meta.db_table)}')
+
+    def choice(self, weights):
+        return self.rng.choices(list(weights), weights=list(weights.values()))[0]
+
+    def sentence(self, low, high, rng=None):
+        rng = rng or self.rng
+        return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(low, high)))
+
+    def create_employees(self, count):
+        rng = self.rng
+        employees = [
+            Employee(
+                firstname=rng.choice(FIRSTNAMES),
+                lastname=rng.choice(LASTNAMES),
+                role=self.choice(ROLE_WEIGHTS),
+                department=rng.choice(DEPARTMENTS),
+                is_active=rng.random() > 0.05,
+            )
+            for _ in range(count)
+        ]
+        with transaction.atomic():
+            Employee.objects.bulk_create(employees, batch_size=1000)
+        return [employee.id for employee in employees]
+
+    def create_tasks(self, offset, count, employee_ids):
+        rng = self.rng
+        today = date.today()
+        tasks, comment_counts = [], []
+        for i in range(offset, offset + count):
+            start = today - timedelta(days=rng.randint(0, 730))
+            tasks.append(Task(
+                title=f'{rng.choice(VERBS)} {rng.choice(NOUNS)} #{i + 1}',
+                description=self.sentence(5, 30),
+                status=self.choice(STATUS_WEIGHTS),
+                priority=rng.choice(PRIORITY_CHOICES)[0],
+                start_date=start,
+                end_date=start + timedelta(days=rng.randint(1, 60)),
+                employee_id=rng.choice(employee_ids) if rng.random() > 0.1 else None,
+                tester_id=rng.choice(employee_ids) if rng.random() > 0.5 else None,
+                created_by_id=rng.choice(employee_ids),
+                version=f'v{rng.randint(1, 3)}.{rng.randint(0, 9)}',
+            ))
+            comment_counts.append(rng.randint(0, MAX_COMMENTS_PER_TASK))
+
+        rng = self.comment_rng
+        with transaction.atomic():
+            Task.objects.bulk_create(tasks, batch_size=1000)
+            comments = [
+                Comment(task_id=task.id, author_id=rng.choice(employee_ids), text=self.sentence(3, 20, rng))
+                for task, total in zip(tasks, comment_counts) for _ in range(total)
+            ]
+            Comment.objects.bulk_create(comments, batch_size=1000)
+            Task.objects.filter(id__range=(tasks[0].id, tasks[-1].id)).refresh_comment_stats()
+        return len(comments)
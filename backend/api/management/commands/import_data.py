@@ -1,6 +1,65 @@
 import json
+import time
+from itertools import chain, islice
+
 from django.core.management.base import BaseCommand
-from api.models import Task, Employee, Comment
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+from api.cache import bump_generation_on_commit
+from api.models import Task, Employee, Comment, EmployeeWorkload
+from api.workload import rebuild_workload
+
+
+def iter_json_array(f, chunk_size=1 << 16):
+    """逐块读取 JSON 数组，每次只解码一个元素，内存占用与文件大小无关"""
+    decoder = json.JSONDecoder()
+    buffer, eof, started = '', False, False
+    while True:
+        if not eof and len(buffer) < chunk_size:
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer += chunk
+        buffer = buffer.lstrip()
+
+        if not started:
+            if not buffer.startswith('['):
+                raise json.JSONDecodeError('Expecting "["', buffer, 0)
+            buffer, started = buffer[1:], True
+            continue
+        if buffer.startswith(']'):
+            return
+        if buffer.startswith(','):
+            buffer = buffer[1:]
+            continue
+
+        try:
+            item, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # 元素被块边界截断，继续读
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer += chunk
+            continue
+        yield item
+        buffer = buffer[end:]
+
+
+def iter_ndjson(f):
+    """NDJSON / JSON Lines：每行一个 JSON 对象"""
+    for line in f:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
 
 class Command(BaseCommand): #创建一个命令类，必须叫 Command，继承 BaseCommand
     help = 'import Data from JSON files' # 帮助文本，当你运行 python manage.py help import_data 时会显示这段文字
@@ -8,31 +67,45 @@ class Command(BaseCommand): #创建一个命令类，必须叫 Command，继承
     def add_arguments(self, parser): #定义命令参数: 用来定义命令接受什么参数
         parser.add_argument('json_file', type=str, help='json file pfade') #定义第一个必需参数, ohne--，就是 JSON 文件的路径
         parser.add_argument('--model', type=str, help='models: task, employee, comment')#定义一个可选参数 --model
+        parser.add_argument('--format', choices=['auto', 'json', 'ndjson'], default='auto',
+                            help='json (array) or ndjson (one object per line), auto: by file extension')
+        parser.add_argument('--batch-size', type=int, default=1000, help='rows per bulk write / transaction')
+        parser.add_argument('--dry-run', action='store_true', help='parse and resolve everything, write nothing')
 
     def handle(self, *args, **kwargs): #主处理逻辑:是命令的主要执行逻辑，当你运行命令时，这个方法会被调用
         json_file= kwargs['json_file'] #获取用户输入的文件路径参数
-        model_name = kwargs.get('model', '').lower() #获取 --model 参数，如果用户没提供，默认为空字符串
+        model_name = (kwargs.get('model') or '').lower() #获取 --model 参数，如果用户没提供，默认为空字符串
+        self.batch_size = kwargs['batch_size']
+        self.dry_run = kwargs['dry_run']
+
+        file_format = kwargs['format']
+        if file_format == 'auto':
+            file_format = 'ndjson' if json_file.lower().endswith(('.ndjson', '.jsonl')) else 'json'
 
         try:
             with open(json_file, 'r', encoding='utf-8') as f:
-                data = json.load(f) #将 JSON 文件内容解析成 Python 数据结构
-
-            if model_name == 'employee' or 'employees' in json_file.lower():
-                self.import_employees(data)
-            elif model_name == 'task' or 'tasks' in json_file.lower():
-                self.import_tasks(data)
-            elif model_name == 'comment' or 'comments' in json_file.lower():
-                self.import_comments(data)
-
-            else:
-                self.stdout.write(self.style.WARNING('not expected models, trying to read...'))
-                if isinstance(data, list) and len(data) > 0: #检查数据是否是列表
-                    if 'department' in data[0]:
-                        self.import_employees(data)
-                    elif 'title' in data[0] and 'start_date' in data[0]:
-                        self.import_tasks(data)
-                    elif 'text' in data[0] and 'author' in data[0]:
-                        self.import_comments(data)
+                # 流式读取：不再 json.load 整个文件
+                data = iter_ndjson(f) if file_format == 'ndjson' else iter_json_array(f)
+                self.started = time.perf_counter()
+
+                if model_name == 'employee' or 'employees' in json_file.lower():
+                    self.import_employees(data)
+                elif model_name == 'task' or 'tasks' in json_file.lower():
+                    self.import_tasks(data)
+                elif model_name == 'comment' or 'comments' in json_file.lower():
+                    self.import_comments(data)
+
+                else:
+                    self.stdout.write(self.style.WARNING('not expected models, trying to read...'))
+                    first = next(data, None) #只看第一条记录判断类型
+                    if isinstance(first, dict):
+                        data = chain([first], data)
+                        if 'department' in first:
+                            self.import_employees(data)
+                        elif 'title' in first and 'start_date' in first:
+                            self.import_tasks(data)
+                        elif 'text' in first and 'author' in first:
+                            self.import_comments(data)
 
         except FileNotFoundError:
             self.stdout.write(self.style.ERROR(f'File not found {json_file}')) #文件未找到:
@@ -41,75 +114,140 @@ class Command(BaseCommand): #创建一个命令类，必须叫 Command，继承
         except Exception as e:
             self.stdout.write(self.style.ERROR(f'Import failed: {str(e)}')) #导入失败
 
+    def finish(self, model, count, label, rows):
+        """输出导入数量和吞吐量（行/秒）"""
+        if not self.dry_run:
+            bump_generation_on_commit(model)  # bulk_create / bulk_update 不发送 signal，手动让 API 缓存失效
+            # 明确指定了 ID 时，PostgreSQL 的自增序列不会前进，这里重置到最大 ID（SQLite 不需要）
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(no_style(), [model]):
+                    cursor.execute(sql)
+        elapsed = time.perf_counter() - self.started
+        rate = rows / elapsed if elapsed > 0 else 0
+        verb = 'would import' if self.dry_run else 'successfully imported'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {count} {label}'))
+        self.stdout.write(f'{rows} rows in {elapsed:.2f}s ({rate:.0f} rows/s)')
+
     #导入员工数据的方法
     def import_employees(self, data):
-        count = 0
-        for item in data:
-           employee, created = Employee.objects.update_or_create( #先查找是否已存在, 如果存在：返回这个员工, 如果不存在：创建新员工
-                id=item['id'],  # 明确指定 ID, ansonsten Django 会自动生成新的 ID
-                defaults={ #defaults={} - 只在创建新记录时使用的字段,如果不存在则用空字符串
-                    'role': item.get('role', 'staff'),
-                    'firstname': item['firstname'], #name 字段（必须存在，否则报错）
-                    'lastname': item['lastname'],
-                    'department' : item.get('department', ''),
-                    'is_active': item.get('is_active', True),  # 可用来禁用员工账户                                               
-                }
-            )
-           if created:
-              count += 1
-        self.stdout.write(self.style.SUCCESS(f'successfully imported {count} employees')) 
+        count = rows = 0
+        fields = ['role', 'firstname', 'lastname', 'department', 'is_active', 'updated_at']
+        for batch in batched(data, self.batch_size):
+            rows += len(batch)
+            with transaction.atomic():
+                existing = Employee.objects.in_bulk([item['id'] for item in batch]) #每批一次查询已存在的员工
+                to_create, to_update = {}, {}
+                for item in batch:
+                    values = { # 与原来 update_or_create 的 defaults 相同
+                        'role': item.get('role', 'staff'),
+                        'firstname': item['firstname'], #name 字段（必须存在，否则报错）
+                        'lastname': item['lastname'],
+                        'department' : item.get('department', ''),
+                        'is_active': item.get('is_active', True),  # 可用来禁用员工账户
+                    }
+                    employee = existing.get(item['id'])
+                    if employee is None:
+                        # 明确指定 ID, ansonsten Django 会自动生成新的 ID
+                        employee = Employee(id=item['id'], **values)
+                        existing[employee.id] = employee  # 同一文件里重复的 ID 只创建一次
+                        to_create[employee.id] = employee
+                    else:
+                        for name, value in values.items():
+                            setattr(employee, name, value)
+                        employee.updated_at = timezone.now()  # bulk_update 不会触发 auto_now
+                        if employee.id not in to_create:
+                            to_update[employee.id] = employee
+
+                if not self.dry_run:
+                    Employee.objects.bulk_create(to_create.values(), batch_size=self.batch_size)
+                    # 新员工的工作量汇总行（bulk_create 不发送 signal）
+                    EmployeeWorkload.objects.bulk_create(
+                        [EmployeeWorkload(employee_id=pk) for pk in to_create],
+                        batch_size=self.batch_size, ignore_conflicts=True,
+                    )
+                    Employee.objects.bulk_update(to_update.values(), fields, batch_size=self.batch_size)
+            count += len(to_create)
+        self.finish(Employee, count, 'employees', rows)
+        return count
 
     #导入task的方法
     def import_tasks(self, data):
-        count = 0
-        for item in data:
-             # 处理外键字段（employee、tester、created_by）
-            employee = None
-            if item.get('employee_id'):
-                employee = Employee.objects.filter(id=item['employee_id']).first() # 返回对象，
-
-            tester = None
-            if item.get('tester_id'):
-                tester = Employee.objects.filter(id=item['tester_id']).first()
-
-            created_by = None
-            if item.get('created_by_id'):
-                created_by = Employee.objects.filter(id=item['created_by_id']).first()
-
-            task, created = Task.objects.get_or_create(
-                title=item['title'],
-                start_date=item['start_date'], #如果已存在同名且同开始日期的任务，就不重复创建
-                defaults={
-                    'description': item.get('description', ''),
-                    'status': item.get('status', 'nicht_zugewiesen'),
-                    'priority': item.get('priority', 'medium'),                    
-                    'end_date': item.get('end_date'),                   
-                    'employee': employee,  # 这里传对象
-                    'tester': tester, #Django 外键必须传 model 实例，而不是 ID 数字
-                    'created_by': created_by,
-                    'version': item.get('version', 'v1.0'),                   
-                }
-            )
-            if created:
-                count += 1
-        self.stdout.write(self.style.SUCCESS(f'successfully imported {count} tasks'))
+        count = rows = 0
+        employee_ids = set(Employee.objects.values_list('id', flat=True)) #外键只需要 ID，预先一次性加载
+        start_date_field = Task._meta.get_field('start_date')
+
+        def employee_id(value):
+            return value if value in employee_ids else None # 不存在的员工与原来 .first() 一样视为 None
+
+        for batch in batched(data, self.batch_size):
+            rows += len(batch)
+            with transaction.atomic():
+                # 如果已存在同名且同开始日期的任务，就不重复创建（每批一次查询）
+                keys = [(item['title'], start_date_field.to_python(item['start_date'])) for item in batch]
+                seen = set(Task.objects.filter(
+                    title__in={title for title, _ in keys},
+                    start_date__in={start for _, start in keys},
+                ).values_list('title', 'start_date'))
+                # export_data 导出的文件带 id：保留原 ID，评论文件才能对应上；已存在的 ID 跳过
+                ids = [item['id'] for item in batch if item.get('id') is not None]
+                seen_ids = set(Task.objects.filter(id__in=ids).values_list('id', flat=True)) if ids else set()
+
+                to_create = []
+                for key, item in zip(keys, batch):
+                    if key in seen or item.get('id') in seen_ids:
+                        continue
+                    seen.add(key)
+                    if item.get('id') is not None:
+                        seen_ids.add(item['id'])
+                    to_create.append(Task(
+                        id=item.get('id'),
+                        title=key[0],
+                        start_date=key[1],
+                        description=item.get('description', ''),
+                        status=item.get('status', 'nicht_zugewiesen'),
+                        priority=item.get('priority', 'medium'),
+                        end_date=item.get('end_date'),
+                        employee_id=employee_id(item.get('employee_id')),
+                        tester_id=employee_id(item.get('tester_id')),
+                        created_by_id=employee_id(item.get('created_by_id')),
+                        version=item.get('version', 'v1.0'),
+                    ))
+
+                if not self.dry_run:
+                    Task.objects.bulk_create(to_create, batch_size=self.batch_size)
+                    # 只重新计算这一批涉及的员工的工作量
+                    rebuild_workload({pk for task in to_create for pk in (task.employee_id, task.tester_id) if pk})
+            count += len(to_create)
+        self.finish(Task, count, 'tasks', rows)
+        return count
 
     #导入评论数据的方法
     def import_comments(self, data):
-        count = 0
-        for item in data:
-            try:
-                task = Task.objects.get(id=item['task']) #评论需要关联到任务，所以先查找任务
-
-                # 查找作者，如果不存在则跳过该评论
-                author = Employee.objects.filter(id=item.get('author')).first()
-          
-                comment = Comment.objects.create(
-                    task=task,
+        count = rows = 0
+        task_ids = set(Task.objects.values_list('id', flat=True)) #评论需要关联到任务，预先加载所有任务 ID
+        employee_ids = set(Employee.objects.values_list('id', flat=True))
+
+        for batch in batched(data, self.batch_size):
+            rows += len(batch)
+            to_create = []
+            for item in batch:
+                if item['task'] not in task_ids:
+                    self.stdout.write(self.style.WARNING(f'Task ID {item["task"]} not exists'))
+                    continue
+                author = item.get('author')
+                to_create.append(Comment(
+                    task_id=item['task'],
                     text=item['text'],
-                    author=author,                    
-                )
-                count += 1
-            except Task.DoesNotExist:
-                self.stdout.write(self.style.WARNING(f'Task ID {item["task"]} not exists'))
-        self.stdout.write(self.style.SUCCESS(f'successfully imported {count} comments'))
\ No newline at end of file
+                    author_id=author if author in employee_ids else None, # 作者不存在时为空
+                ))
+
+            if not self.dry_run:
+                with transaction.atomic():
+                    Comment.objects.bulk_create(to_create, batch_size=self.batch_size)
+                    # bulk_create 不发送 signal，重新计算这一批涉及的任务的评论统计
+                    Task.objects.filter(id__in={c.task_id for c in to_create}).refresh_comment_stats()
+            count += len(to_create)
+        self.finish(Comment, count, 'comments', rows)
+        if not self.dry_run:
+            bump_generation_on_commit(Task)
+        return count
@@ -0,0 +1,127 @@
+import asyncio
+import json
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.test.utils import override_settings
+
+from api.models import Task
+
+
+async def asgi_get(app, url, bandwidth):
+    """直接调用 ASGI 应用发一个 GET；bandwidth（字节/秒）模拟慢客户端：按收到的字节数等待"""
+    path, _, query = url.partition('?')
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+        'query_string': query.encode(), 'headers': [(b'host', b'localhost')],
+        'client': ('127.0.0.1', 0), 'server': ('localhost', 80),
+    }
+    sent_body = False
+
+    async def receive():
+        nonlocal sent_body
+        if not sent_body:
+            sent_body = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await asyncio.Event().wait()  # 客户端不会断开
+
+    result = {'status': None, 'bytes': 0}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            result['status'] = message['status']
+        elif message['type'] == 'http.response.body':
+            body = message.get('body', b'')
+            result['bytes'] += len(body)
+            if bandwidth:
+                await asyncio.sleep(len(body) / bandwidth)
+
+    started = time.perf_counter()
+    await app(scope, receive, send)
+    return time.perf_counter() - started, result['status'], result['bytes']
+
+
+async def run_load(app, url, requests, concurrency, bandwidth):
+    semaphore = asyncio.Semaphore(concurrency)
+    peak_threads = threading.active_count()
+
+    async def one():
+        nonlocal peak_threads
+        async with semaphore:
+            outcome = await asgi_get(app, url, bandwidth)
+            peak_threads = max(peak_threads, threading.active_count())
+            return outcome
+
+    started = time.perf_counter()
+    outcomes = await asyncio.gather(*[one() for _ in range(requests)])
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for latency, _, _ in outcomes)
+    return {
+        'url': url,
+        'requests': requests,
+        'errors': sum(1 for _, status, _ in outcomes if status != 200),
+        'rps': requests / elapsed,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p95_ms': latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        'bytes': outcomes[0][2],
+        'peak_threads': peak_threads,
+    }
+
+
+class Command(BaseCommand):
+    help = 'Compare the sync (DRF) and async read endpoints under concurrent load, in-process via the ASGI app'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='requests per endpoint')
+        parser.add_argument('--concurrency', type=int, default=50, help='requests in flight at the same time')
+        parser.add_argument('--client-kbps', type=float, default=0,
+                            help='simulate slow clients reading at this many KB/s (0: unlimited)')
+        parser.add_argument('--page-size', type=int, default=500, help='rows per list response')
+        parser.add_argument('--task', type=int, help='task used for detail/comments (default: the one with most comments)')
+        parser.add_argument('--with-cache', action='store_true', help='keep the sync response cache enabled')
+        parser.add_argument('--json', dest='json_file', help='also write the results to this file')
+
+    def handle(self, *args, **kwargs):
+        from backend.asgi import application
+
+        task_id = kwargs['task'] or self.default_task()
+        size = kwargs['page_size']
+        endpoints = [
+            ('task list', f'/api/tasks/?page_size={size}', f'/api/async/tasks/?limit={size}'),
+            ('task detail', f'/api/tasks/{task_id}/', f'/api/async/tasks/{task_id}/'),
+            ('comments by task', f'/api/comments/?task_id={task_id}&page_size={size}',
+             f'/api/async/tasks/{task_id}/comments/'),
+        ]
+        bandwidth = kwargs['client_kbps'] * 1024
+
+        # 默认关闭响应缓存，比较的是查询 + 序列化本身
+        timeout = None if kwargs['with_cache'] else 0
+        results = []
+        with override_settings(**({} if timeout is None else {'API_CACHE_TIMEOUT': timeout})):
+            for name, sync_url, async_url in endpoints:
+                for mode, url in (('sync', sync_url), ('async', async_url)):
+                    stats = asyncio.run(run_load(application, url, kwargs['requests'], kwargs['concurrency'], bandwidth))
+                    results.append({'endpoint': name, 'mode': mode, **stats})
+
+        self.stdout.write(
+            f"{'endpoint':<18}{'mode':<7}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'threads':>9}{'errors':>8}"
+        )
+        for row in results:
+            self.stdout.write(
+                f"{row['endpoint']:<18}{row['mode']:<7}{row['rps']:>9.1f}{row['p50_ms']:>9.1f}"
+                f"{row['p95_ms']:>9.1f}{row['peak_threads']:>9}{row['errors']:>8}"
+            )
+        if kwargs['json_file']:
+            with open(kwargs['json_file'], 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+
+    def default_task(self):
+        task = Task.objects.annotate(comment_total=Count('comments')).order_by('-comment_total').first()
+        if task is None:
+            raise CommandError('no tasks in the database, import or generate some first')
+        return task.id
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api.search import ensure_search_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for tasks and comments'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='database alias')
+
+    def handle(self, *args, **kwargs):
+        ensure_search_index(kwargs['database'], rebuild=True)
+        self.stdout.write(self.style.SUCCESS('search index rebuilt'))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from api.cache import bump_generation_on_commit
+from api.models import Employee
+from api.workload import rebuild_workload, workload_drift
+
+
+class Command(BaseCommand):
+    help = 'Recompute the EmployeeWorkload summary from the tasks table (run daily: overdue_tasks depends on the date)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help='only report employees whose workload is wrong')
+
+    def handle(self, *args, **kwargs):
+        if kwargs['check']:
+            drift = workload_drift()
+            self.stdout.write(f'{len(drift)} employees with wrong workload')
+            return
+
+        rebuilt = rebuild_workload()
+        bump_generation_on_commit(Employee)  # bulk_create 不发送 signal
+        self.stdout.write(self.style.SUCCESS(f'rebuilt workload of {rebuilt} employees'))
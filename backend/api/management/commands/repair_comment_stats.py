@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, Max, Q
+
+from api.cache import bump_generation_on_commit
+from api.models import Task
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = 'Recompute Task.comment_count / last_comment_at from the comments table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help='only report tasks whose stats are wrong')
+
+    def handle(self, *args, **kwargs):
+        # 一条 GROUP BY 找出与实际评论不一致的任务
+        same_last = Q(last_comment_at=F('actual_last')) | Q(last_comment_at__isnull=True, actual_last__isnull=True)
+        ids = list(Task.objects.annotate(
+            actual_count=Count('comments'), actual_last=Max('comments__created_at'),
+        ).exclude(Q(comment_count=F('actual_count')) & same_last).order_by().values_list('id', flat=True))
+
+        if kwargs['check'] or not ids:
+            self.stdout.write(f'{len(ids)} tasks with wrong comment stats')
+            return
+
+        repaired = 0
+        for start in range(0, len(ids), BATCH_SIZE):
+            repaired += Task.objects.filter(id__in=ids[start:start + BATCH_SIZE]).refresh_comment_stats()
+        bump_generation_on_commit(Task)  # update() 不发送 signal
+        self.stdout.write(self.style.SUCCESS(f'repaired comment stats of {repaired} tasks'))
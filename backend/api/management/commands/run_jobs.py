@@ -0,0 +1,90 @@
+import multiprocessing
+import os
+import signal
+import socket
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connections
+
+from api.jobs import claim, requeue_stale, run_job
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs (imports, exports, statistics rebuilds) submitted via /api/jobs/'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=0,
+                            help='run jobs in a pool of this many processes (0: in this process, one at a time)')
+        parser.add_argument('--poll', type=float, default=1.0, help='seconds between checks for new jobs')
+        parser.add_argument('--once', action='store_true', help='exit when the queue is empty')
+        parser.add_argument('--stale-after', type=int, default=None,
+                            help='requeue running jobs without progress for this many seconds (default JOB_STALE_AFTER)')
+
+    def handle(self, *args, **kwargs):
+        processes, poll = kwargs['processes'], kwargs['poll']
+        if processes < 0:
+            raise CommandError('--processes must not be negative')
+        worker = f'{socket.gethostname()}:{os.getpid()}'
+        stale_after = kwargs['stale_after'] or getattr(settings, 'JOB_STALE_AFTER', 600)
+        requeued = requeue_stale(stale_after)
+        if requeued:
+            self.stdout.write(self.style.WARNING(f'requeued {requeued} stale jobs'))
+
+        self.stopping = False
+        if not kwargs['once']:
+            # SIGTERM / Ctrl+C：不再领取新任务，等正在执行的任务结束
+            for sig in (signal.SIGTERM, signal.SIGINT):
+                signal.signal(sig, self.stop)
+
+        pool = None
+        if processes:
+            connections.close_all()  # 子进程各自建立数据库连接
+            # spawn 出来的子进程先加载 Django（DJANGO_SETTINGS_MODULE 从父进程继承），再执行 run_job
+            pool = ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context('spawn'),
+                                       initializer=django.setup)
+        running = {}  # future → job id
+        done_count = 0
+        try:
+            while True:
+                claimed = False
+                while not self.stopping and len(running) < max(processes, 1):
+                    pk = claim(worker)
+                    if pk is None:
+                        break
+                    claimed = True
+                    if pool is None:
+                        self.report(pk, run_job(pk))
+                        done_count += 1
+                        close_old_connections()
+                    else:
+                        running[pool.submit(run_job, pk)] = pk
+
+                if running:
+                    finished, _ = wait(running, timeout=poll, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        pk = running.pop(future)
+                        try:
+                            status = future.result()
+                        except Exception as exc:  # 子进程异常退出等，任务留在 running，超时后重新排队
+                            status = f'error ({exc})'
+                        self.report(pk, status)
+                        done_count += 1
+                elif self.stopping or (kwargs['once'] and not claimed):
+                    break
+                elif not claimed:
+                    time.sleep(poll)
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=True)
+        self.stdout.write(f'{done_count} jobs processed')
+
+    def stop(self, signum, frame):
+        self.stopping = True
+
+    def report(self, pk, status):
+        style = self.style.SUCCESS if status == 'succeeded' else self.style.WARNING
+        self.stdout.write(style(f'job {pk}: {status}'))
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.8 on 2026-10-18 08:47
+
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_comment_stats(apps, schema_editor):
+    """已有数据：从 Comment 表一次性算出统计（与 TaskQuerySet.refresh_comment_stats 相同）"""
+    Task = apps.get_model('api', 'Task')
+    Comment = apps.get_model('api', 'Comment')
+    comments = Comment.objects.filter(task=OuterRef('pk')).order_by().values('task')
+    Task.objects.using(schema_editor.connection.alias).update(
+        comment_count=Coalesce(Subquery(comments.annotate(total=Count('id')).values('total')), 0),
+        last_comment_at=Subquery(comments.annotate(latest=Max('created_at')).values('latest')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_alter_employee_department_alter_task_status_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='last_comment_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['-last_comment_at'], name='api_task_last_co_28300b_idx'),
+        ),
+        migrations.RunPython(fill_comment_stats, migrations.RunPython.noop),
+    ]
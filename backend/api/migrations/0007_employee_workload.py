@@ -0,0 +1,61 @@
+# Generated by Django 5.2.8 on 2026-10-18 08:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.utils import timezone
+
+CLOSED_STATUSES = ['abgeschlossen', 'archiviert']
+
+
+def fill_workload(apps, schema_editor):
+    """已有数据：按员工汇总一次（与 api.workload.rebuild_workload 相同的计算）"""
+    db = schema_editor.connection.alias
+    Employee = apps.get_model('api', 'Employee')
+    Task = apps.get_model('api', 'Task')
+    EmployeeWorkload = apps.get_model('api', 'EmployeeWorkload')
+    today = timezone.now().date()
+    open_q = ~Q(status__in=CLOSED_STATUSES)
+
+    counts = {}
+    for row in Task.objects.using(db).filter(employee__isnull=False).order_by().values('employee_id').annotate(
+        open_tasks=Count('id', filter=open_q),
+        overdue_tasks=Count('id', filter=open_q & Q(end_date__lt=today)),
+        completed_tasks=Count('id', filter=Q(status='abgeschlossen')),
+    ):
+        counts[row.pop('employee_id')] = row
+    testing = dict(Task.objects.using(db).filter(open_q, tester__isnull=False).order_by().values(
+        'tester_id'
+    ).annotate(total=Count('id')).values_list('tester_id', 'total'))
+
+    EmployeeWorkload.objects.using(db).bulk_create([
+        EmployeeWorkload(employee_id=pk, open_tests=testing.get(pk, 0), **counts.get(pk, {}))
+        for pk in Employee.objects.using(db).values_list('id', flat=True)
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_task_comment_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmployeeWorkload',
+            fields=[
+                ('employee', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='workload', serialize=False, to='api.employee')),
+                ('open_tasks', models.PositiveIntegerField(default=0)),
+                ('overdue_tasks', models.PositiveIntegerField(default=0)),
+                ('completed_tasks', models.PositiveIntegerField(default=0)),
+                ('open_tests', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Arbeitslast',
+                'verbose_name_plural': 'Arbeitslast',
+                'indexes': [models.Index(fields=['-open_tasks'], name='api_employe_open_ta_d99104_idx')],
+            },
+        ),
+        migrations.RunPython(fill_workload, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.8 on 2026-10-18 08:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_employee_workload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='priority_rank',
+            field=models.GeneratedField(db_persist=True, expression=models.Case(models.When(priority='low', then=models.Value(0)), models.When(priority='medium', then=models.Value(1)), models.When(priority='high', then=models.Value(2)), models.When(priority='urgent', then=models.Value(3)), default=models.Value(1)), output_field=models.PositiveSmallIntegerField()),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['-priority_rank', '-created_at'], name='api_task_priorit_83a113_idx'),
+        ),
+    ]
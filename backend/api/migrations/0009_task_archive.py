@@ -0,0 +1,99 @@
+# Generated by Django 5.2.8 on 2026-10-18 08:59
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_task_priority_rank'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedComment',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('text', models.TextField()),
+                ('is_edited', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Archivierter Kommentar',
+                'verbose_name_plural': 'Archivierte Kommentare',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedTask',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('nicht_zugewiesen', 'Nicht zugewiesen'), ('offen', 'Offen'), ('abgeschlossen', 'Abgeschlossen'), ('archiviert', 'Archiviert')], max_length=20)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('priority', models.CharField(choices=[('low', 'Niedrig'), ('medium', 'Mittel'), ('high', 'Hoch'), ('urgent', 'Dringend')], max_length=20)),
+                ('version', models.CharField(blank=True, max_length=50, null=True)),
+                ('comment_count', models.PositiveIntegerField(default=0)),
+                ('last_comment_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Archivierte Aufgabe',
+                'verbose_name_plural': 'Archivierte Aufgaben',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('status', 'archiviert'), _negated=True), fields=['-created_at', 'id'], name='api_task_active_created_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedcomment',
+            name='author',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.employee'),
+        ),
+        migrations.AddField(
+            model_name='archivedtask',
+            name='created_by',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.employee'),
+        ),
+        migrations.AddField(
+            model_name='archivedtask',
+            name='employee',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.employee'),
+        ),
+        migrations.AddField(
+            model_name='archivedtask',
+            name='tester',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.employee'),
+        ),
+        migrations.AddField(
+            model_name='archivedtask',
+            name='updated_by',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.employee'),
+        ),
+        migrations.AddField(
+            model_name='archivedcomment',
+            name='task',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comments', to='api.archivedtask'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedtask',
+            index=models.Index(fields=['-created_at'], name='api_archive_created_f53b42_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedtask',
+            index=models.Index(fields=['archived_at'], name='api_archive_archive_3c986a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedcomment',
+            index=models.Index(fields=['task', '-created_at'], name='api_archive_task_id_d3b0cc_idx'),
+        ),
+    ]
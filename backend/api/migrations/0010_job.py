@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_task_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('import', 'Import'), ('export', 'Export'), ('rebuild_stats', 'Statistiken neu berechnen')], max_length=30)),
+                ('status', models.CharField(choices=[('queued', 'Wartend'), ('running', 'Läuft'), ('succeeded', 'Erfolgreich'), ('failed', 'Fehlgeschlagen'), ('cancelled', 'Abgebrochen')], default='queued', max_length=20)),
+                ('params', models.JSONField(blank=True, default=dict)),
+                ('processed', models.PositiveIntegerField(default=0)),
+                ('total', models.PositiveIntegerField(blank=True, null=True)),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+                ('worker', models.CharField(blank=True, max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Hintergrundauftrag',
+                'verbose_name_plural': 'Hintergrundaufträge',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['-created_at'], name='api_job_created_653210_idx'), models.Index(fields=['status', 'id'], name='api_job_status_f9c6bf_idx')],
+            },
+        ),
+    ]
@@ -1,8 +1,11 @@
 from collections import namedtuple
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.forms import ValidationError
 from django.core.exceptions import ValidationError
+from django.db.models import Case, Count, Max, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
 # 定义在类外部
 Status = namedtuple('Status', ['key', 'label', 'color'])
@@ -19,6 +22,10 @@ ROLE_CHOICES = [
         ("staff", "Staff"),
 ]
 
+# 已结束的状态不再算过期
+CLOSED_STATUSES = ['abgeschlossen', 'archiviert']
+ARCHIVED_STATUS = 'archiviert'
+
 PRIORITY_CHOICES = [
     ('low', 'Niedrig'),
     ('medium', 'Mittel'),
@@ -26,6 +33,11 @@ PRIORITY_CHOICES = [
     ('urgent', 'Dringend'),
 ]
 
+# 模块加载时建好的查找表，序列化每一行时 O(1) 查找，不再遍历 choices
+STATUS_BY_KEY = {s.key: s for s in STATUS_CHOICES}
+STATUS_COLORS = {s.key: s.color for s in STATUS_CHOICES}
+PRIORITY_RANK = {key: rank for rank, (key, _) in enumerate(PRIORITY_CHOICES)}  # low=0 … urgent=3
+
 class Employee(models.Model):
     user = models.OneToOneField(
         User, 
@@ -69,8 +81,69 @@ class Employee(models.Model):
     def is_manager(self):
         return self.role == "manager"
     
+class LoadedValuesMixin:
+    """
+    记录从数据库加载时的列值（_loaded_values），保存后更新
+    据此可以知道实例改了哪些列，不用再查一次数据库
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            name: value for name, value in zip(field_names, values) if value is not models.DEFERRED
+        }
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._loaded_values = self._current_values()
+
+    def _current_values(self):
+        deferred = self.get_deferred_fields()
+        return {
+            f.attname: getattr(self, f.attname)
+            for f in self._meta.concrete_fields if f.attname not in deferred
+        }
+
+    def changed_fields(self):
+        """与加载时相比值变了的列（attname）；不是从数据库加载的实例返回 None"""
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            return None
+        return [name for name, value in self._current_values().items() if name in loaded and loaded[name] != value]
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._loaded_values = self._current_values()
+
+
+def overdue_q(today=None):
+    """过期条件（SQL 版的 Task.is_overdue）"""
+    today = today or timezone.now().date()
+    return Q(end_date__lt=today) & ~Q(status__in=CLOSED_STATUSES)
+
+
+class TaskQuerySet(models.QuerySet):
+    def active(self):
+        """不含已归档状态的任务（列表默认只看这些，走部分索引）"""
+        return self.exclude(status=ARCHIVED_STATUS)
+
+    def overdue(self, flag=True):
+        condition = overdue_q()
+        return self.filter(condition) if flag else self.exclude(condition)
+
+    def refresh_comment_stats(self):
+        """从 Comment 表重新计算 comment_count / last_comment_at，一条 UPDATE（修复命令和批量导入使用）"""
+        comments = Comment.objects.filter(task=OuterRef('pk')).order_by().values('task')
+        return self.update(
+            comment_count=Coalesce(Subquery(comments.annotate(total=Count('id')).values('total')), 0),
+            last_comment_at=Subquery(comments.annotate(latest=Max('created_at')).values('latest')),
+        )
+
+
 # Create your models here.
-class Task(models.Model): 
+class Task(LoadedValuesMixin, models.Model): 
     
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True, null=True)
@@ -115,9 +188,23 @@ class Task(models.Model):
         choices=PRIORITY_CHOICES,
         default='medium'
     )
+    # 优先级的数字等级，由数据库根据 priority 计算并存储（批量写入、update() 也保持一致），按它排序才是 urgent > high > …
+    priority_rank = models.GeneratedField(
+        expression=Case(
+            *[When(priority=key, then=Value(rank)) for key, rank in PRIORITY_RANK.items()],
+            default=Value(PRIORITY_RANK['medium']),
+        ),
+        output_field=models.PositiveSmallIntegerField(),
+        db_persist=True,
+    )
     version = models.CharField(max_length=50, blank=True, null=True)
+    # 冗余的评论统计，由 signals 在评论新建/删除时用 F() 原子更新，列表不必加载评论
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    last_comment_at = models.DateTimeField(null=True, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    objects = TaskQuerySet.as_manager()
         
     class Meta:
         ordering = ['-created_at']   # - 减号表示降序(从新到旧), '-name'降序 (Z→A)
@@ -128,6 +215,11 @@ class Task(models.Model):
             models.Index(fields=['status', 'priority']),
             models.Index(fields=['employee', 'status']),
             models.Index(fields=['start_date', 'end_date']),
+            models.Index(fields=['-last_comment_at']),  # 按最近评论（活跃度）排序 / 过滤
+            models.Index(fields=['-priority_rank', '-created_at']),  # ?ordering=-priority
+            # 部分索引：默认列表不含已归档的任务，索引也只包含其余的行
+            models.Index(fields=['-created_at', 'id'], condition=~Q(status=ARCHIVED_STATUS),
+                         name='api_task_active_created_idx'),
         ]
 
     def __str__(self):
@@ -137,16 +229,12 @@ class Task(models.Model):
     
     @property
     def status_color(self):
-        for s in STATUS_CHOICES:
-            if s.key == self.status:
-                return s.color
-        return '#ffffff'
+        return STATUS_COLORS.get(self.status, '#ffffff')
 
     @property
     def is_overdue(self):
         """是否已过期"""
-        from django.utils import timezone
-        if self.status not in ['abgeschlossen', 'archiviert']:
+        if self.status not in CLOSED_STATUSES:
             return self.end_date < timezone.now().date()
         return False
     
@@ -155,7 +243,7 @@ class Task(models.Model):
             raise ValidationError("Enddatum darf nicht vor Startdatum liegen")
 
     
-class Comment(models.Model):
+class Comment(LoadedValuesMixin, models.Model):
     task = models.ForeignKey(
         Task, 
         related_name='comments',  # 反向查询用 task.comments.all()
@@ -182,16 +270,175 @@ class Comment(models.Model):
         ]
     
     def __str__(self):
-        return f"Comment by {self.author.full_name} on {self.task.title}"
+        return f"Comment by {self.author_name} on {self.task.title}"
     
     @property
     def author_name(self):
         return self.author.full_name if self.author else "Unbekannt"
     
     def save(self, *args, **kwargs):
-        """保存时检查是否编辑过"""
+        """保存时检查是否编辑过，并且只写入变化的列"""
+        loaded = getattr(self, '_loaded_values', None)
         if self.pk:
-            old = Comment.objects.get(pk=self.pk)
-            if old.text != self.text:  #只在 text 修改时
+            original = loaded or {}
+            if 'text' not in original and 'text' not in self.get_deferred_fields():
+                # 不是从数据库加载的实例（例如手动指定 pk），或加载时 text 被 defer 之后又赋值：只能查一次原文
+                original = dict(Comment.objects.filter(pk=self.pk).values('text').first() or {})
+            if 'text' in original and original['text'] != self.text:  #只在 text 修改时
                 self.is_edited = True
-        super().save(*args, **kwargs)
\ No newline at end of file
+
+            update_fields = kwargs.get('update_fields')
+            if update_fields is None and loaded is not None:
+                # 加载时被 defer、之后又赋值的列不在快照里，也要写入（与 Django 对 defer 实例的处理一致）
+                deferred = self.get_deferred_fields()
+                changed = [
+                    f.name for f in self._meta.concrete_fields
+                    if not f.primary_key and f.attname not in deferred
+                    and (f.attname not in loaded or getattr(self, f.attname) != loaded[f.attname])
+                ]
+                kwargs['update_fields'] = changed + ['updated_at']  # auto_now 的列也要写
+            elif update_fields is not None and 'text' in update_fields:
+                kwargs['update_fields'] = {*update_fields, 'is_edited'}
+        # 评论和任务上的评论统计（signals 里更新）在同一个事务里写入
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+
+class EmployeeWorkload(models.Model):
+    """
+    每个员工的任务统计（物化汇总表），由 Task 的 signals 增量维护，见 api/workload.py
+    overdue_tasks 取决于当天日期，需要每天运行一次 rebuild_workload 校正
+    """
+    employee = models.OneToOneField(
+        Employee,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='workload',
+    )
+    open_tasks = models.PositiveIntegerField(default=0)       # 负责的未结束任务
+    overdue_tasks = models.PositiveIntegerField(default=0)    # 其中已过期的
+    completed_tasks = models.PositiveIntegerField(default=0)  # 负责的已完成任务
+    open_tests = models.PositiveIntegerField(default=0)       # 作为测试人员的未结束任务
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Arbeitslast"
+        verbose_name_plural = "Arbeitslast"
+        indexes = [
+            models.Index(fields=['-open_tasks']),
+        ]
+
+    def __str__(self):
+        return f"{self.employee_id}: {self.open_tasks} offen"
+
+
+# ---------- 冷数据：归档表 ----------
+# 已归档且超过保留期的任务连同评论从 api_task / api_comment 移到这里（api/archive.py），
+# 热表和它的索引只包含仍在使用的数据；ID 保持不变，可以原样恢复
+
+class ArchivedTask(models.Model):
+    id = models.BigIntegerField(primary_key=True)  # 原任务的 ID
+    title = models.CharField(max_length=200)
+    description = models.TextField(blank=True, null=True)
+    status = models.CharField(max_length=20, choices=[(s.key, s.label) for s in STATUS_CHOICES])
+    start_date = models.DateField()
+    end_date = models.DateField()
+    # related_name='+'：员工不需要反向访问归档数据
+    employee = models.ForeignKey(Employee, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    tester = models.ForeignKey(Employee, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_by = models.ForeignKey(Employee, on_delete=models.SET_NULL, null=True, related_name='+')
+    updated_by = models.ForeignKey(Employee, on_delete=models.SET_NULL, null=True, related_name='+')
+    priority = models.CharField(max_length=20, choices=PRIORITY_CHOICES)
+    version = models.CharField(max_length=50, blank=True, null=True)
+    comment_count = models.PositiveIntegerField(default=0)
+    last_comment_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Archivierte Aufgabe"
+        verbose_name_plural = "Archivierte Aufgaben"
+        indexes = [
+            models.Index(fields=['-created_at']),
+            models.Index(fields=['archived_at']),  # 按保留期清理
+        ]
+
+    def __str__(self):
+        return self.title
+
+
+class ArchivedComment(models.Model):
+    id = models.BigIntegerField(primary_key=True)  # 原评论的 ID
+    task = models.ForeignKey(ArchivedTask, on_delete=models.CASCADE, related_name='comments')
+    author = models.ForeignKey(Employee, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    text = models.TextField()
+    is_edited = models.BooleanField(default=False)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Archivierter Kommentar"
+        verbose_name_plural = "Archivierte Kommentare"
+        indexes = [
+            models.Index(fields=['task', '-created_at']),
+        ]
+
+
+# ---------- 后台任务 ----------
+# 导入、导出、统计重建等耗时操作由接口写入一行 Job，命令 run_jobs 领取执行（api/jobs.py）
+
+JOB_KIND_CHOICES = [
+    ('import', 'Import'),
+    ('export', 'Export'),
+    ('rebuild_stats', 'Statistiken neu berechnen'),
+]
+
+JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED = (
+    'queued', 'running', 'succeeded', 'failed', 'cancelled',
+)
+JOB_STATUS_CHOICES = [
+    (JOB_QUEUED, 'Wartend'),
+    (JOB_RUNNING, 'Läuft'),
+    (JOB_SUCCEEDED, 'Erfolgreich'),
+    (JOB_FAILED, 'Fehlgeschlagen'),
+    (JOB_CANCELLED, 'Abgebrochen'),
+]
+JOB_FINISHED_STATUSES = [JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED]
+
+
+class Job(models.Model):
+    kind = models.CharField(max_length=30, choices=JOB_KIND_CHOICES)
+    status = models.CharField(max_length=20, choices=JOB_STATUS_CHOICES, default=JOB_QUEUED)
+    params = models.JSONField(default=dict, blank=True)  # 导入任务的数据也在这里，列表接口不读取这一列
+    processed = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(null=True, blank=True)  # 未知时为空
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    worker = models.CharField(max_length=100, blank=True)  # 执行它的 worker（主机名:进程号）
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)  # 执行中每次写进度都会更新，相当于心跳
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Hintergrundauftrag"
+        verbose_name_plural = "Hintergrundaufträge"
+        indexes = [
+            models.Index(fields=['-created_at']),
+            models.Index(fields=['status', 'id']),  # worker 按提交顺序领取排队中的任务
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
+
+    @property
+    def progress(self):
+        """0–100；总数未知时为空"""
+        if self.status == JOB_SUCCEEDED:
+            return 100
+        if not self.total:
+            return None
+        return min(100, round(self.processed * 100 / self.total))
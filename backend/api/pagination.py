@@ -0,0 +1,12 @@
+from rest_framework.pagination import CursorPagination
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    游标分页：按 (-created_at, id) 定位，不做 OFFSET 扫描，也不执行 COUNT(*)
+    走 Task 的 -created_at 索引和 Comment 的 (task, -created_at) 索引
+    """
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = ('-created_at', 'id')  # id 保证同一时间戳的记录顺序稳定
@@ -0,0 +1,202 @@
+"""
+请求级性能统计（settings.API_PROFILING 打开时才启用）：
+- 每个请求记录 SQL 条数、数据库耗时、序列化耗时、渲染耗时、响应大小
+- 以 Server-Timing 响应头返回（浏览器开发者工具的 Timing 面板可以直接看到），并写一行 JSON 日志
+- 按路由累计，/metrics 以 Prometheus 文本格式输出
+- 同一条 SQL（参数不同）在一个请求里重复执行多次时视为 N+1，记录在日志和指标里
+"""
+import json
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+logger = logging.getLogger('api.profiling')
+
+# 当前请求的统计；ContextVar 会随 sync_to_async 传到线程里，异步视图的 ORM 查询也能记上
+current_profile = ContextVar('api_profile', default=None)
+
+REPEATED_QUERY_THRESHOLD = 5  # 同一条 SQL 在一个请求里执行这么多次就报告为 N+1
+
+
+class RequestProfile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = Counter()  # SQL 模板（参数为 %s）→ 次数
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.render_started = None
+        self.render_time = 0.0
+
+    @property
+    def query_count(self):
+        return sum(self.queries.values())
+
+    def repeated_queries(self, threshold=None):
+        threshold = threshold or getattr(settings, 'API_PROFILING_REPEATED_QUERIES', REPEATED_QUERY_THRESHOLD)
+        return [(sql, count) for sql, count in self.queries.most_common() if count >= threshold]
+
+
+def record_query(execute, sql, params, many, context):
+    """connection.execute_wrappers 里的包装：没有正在统计的请求时直接执行"""
+    profile = current_profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.db_time += time.perf_counter() - started
+        profile.queries[sql] += 1
+
+
+def install_wrapper(connection, **kwargs):
+    """connection_created 的接收函数（在 ApiConfig.ready 里注册）"""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@contextmanager
+def section(name):
+    """统计一段代码的耗时（扣除其中的数据库时间，例如序列化时才执行的预加载查询）"""
+    profile = current_profile.get()
+    if profile is None:
+        yield
+        return
+    started, db_before = time.perf_counter(), profile.db_time
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started - (profile.db_time - db_before)
+        setattr(profile, f'{name}_time', getattr(profile, f'{name}_time') + elapsed)
+
+
+# ---------- 按路由累计的指标 ----------
+
+METRIC_FIELDS = ['requests', 'seconds', 'db_seconds', 'serialize_seconds', 'render_seconds',
+                 'queries', 'response_bytes', 'n_plus_one']
+route_metrics = defaultdict(Counter)  # {(method, route): Counter}
+metrics_lock = threading.Lock()
+
+
+def record_request(key, profile, total, size, repeated):
+    with metrics_lock:
+        counter = route_metrics[key]
+        counter['requests'] += 1
+        counter['seconds'] += total
+        counter['db_seconds'] += profile.db_time
+        counter['serialize_seconds'] += profile.serialize_time
+        counter['render_seconds'] += profile.render_time
+        counter['queries'] += profile.query_count
+        counter['response_bytes'] += size or 0
+        counter['n_plus_one'] += bool(repeated)
+
+
+def prometheus_text():
+    """Prometheus 文本格式（version 0.0.4）：请求指标 + 响应缓存命中率"""
+    from .cache import metrics as cache_metrics
+
+    lines = []
+    with metrics_lock:
+        snapshot = {key: dict(counter) for key, counter in route_metrics.items()}
+    for field in METRIC_FIELDS:
+        name = f'api_request_{field}_total'
+        lines.append(f'# TYPE {name} counter')
+        for (method, route), counter in sorted(snapshot.items()):
+            lines.append(f'{name}{{method="{method}",route="{route}"}} {counter.get(field, 0)}')
+    lines.append('# TYPE api_cache_requests_total counter')
+    for (view, result), count in sorted(cache_metrics.items()):
+        lines.append(f'api_cache_requests_total{{view="{view}",result="{result}"}} {count}')
+    return '\n'.join(lines) + '\n'
+
+
+def server_timing(profile, total):
+    def entry(name, seconds, desc=None):
+        value = f'{name};dur={seconds * 1000:.1f}'
+        return f'{value};desc="{desc}"' if desc else value
+    return ', '.join([
+        entry('db', profile.db_time, f'{profile.query_count} queries'),
+        entry('serialize', profile.serialize_time),
+        entry('render', profile.render_time),
+        entry('total', total),
+    ])
+
+
+class ProfilingMiddleware:
+    """
+    放在 MIDDLEWARE 最前面；settings.API_PROFILING 为 False 时 Django 会直接跳过它（MiddlewareNotUsed）
+    同时支持同步和异步请求
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'API_PROFILING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        profile, token = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_profile.reset(token)
+        return self.finish(request, response, profile)
+
+    async def __acall__(self, request):
+        profile, token = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_profile.reset(token)
+        return self.finish(request, response, profile)
+
+    def start(self):
+        profile = RequestProfile()
+        return profile, current_profile.set(profile)
+
+    def process_template_response(self, request, response):
+        # DRF 的 Response 在这之后渲染，用 post-render 回调记下渲染结束的时间
+        profile = current_profile.get()
+        if profile is not None:
+            profile.render_started = time.perf_counter()
+
+            def rendered(response):
+                profile.render_time = time.perf_counter() - profile.render_started
+            response.add_post_render_callback(rendered)
+        return response
+
+    def finish(self, request, response, profile):
+        total = time.perf_counter() - profile.started
+        size = None if response.streaming else len(response.content)  # 流式响应此时还没有生成内容
+        repeated = profile.repeated_queries()
+        match = request.resolver_match
+        route = match.view_name if match else 'unmatched'
+
+        response['Server-Timing'] = server_timing(profile, total)
+        record_request((request.method, route), profile, total, size, repeated)
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'route': route,
+            'status': response.status_code,
+            'ms': round(total * 1000, 1),
+            'queries': profile.query_count,
+            'db_ms': round(profile.db_time * 1000, 1),
+            'serialize_ms': round(profile.serialize_time * 1000, 1),
+            'render_ms': round(profile.render_time * 1000, 1),
+            'bytes': size,
+        }))
+        for sql, count in repeated:
+            logger.warning(json.dumps({'n_plus_one': route, 'path': request.path, 'count': count, 'sql': sql}))
+        return response
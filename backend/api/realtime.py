@@ -0,0 +1,107 @@
+"""
+实时变更推送：Task / Comment 保存或删除后，把精简的 diff 发到 channel layer 的分组里
+
+分组：
+- feed              所有变更
+- task.<id>         某个任务及其评论
+- employee.<id>     负责/测试的任务，以及这些任务上（或该员工写的）评论
+
+事件格式：
+{"id": "<uuid>", "model": "task" | "comment", "op": "created" | "updated" | "deleted",
+ "pk": 12, "fields": {...只包含变化的字段...}}
+"""
+import json
+import uuid
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+FEED_GROUP = 'feed'
+
+# 推送给前端的列（attname）；只有 updated_at 变化时不推送
+TASK_FIELDS = [
+    'title', 'description', 'status', 'priority', 'start_date', 'end_date',
+    'employee_id', 'tester_id', 'version', 'updated_at',
+]
+COMMENT_FIELDS = ['task_id', 'author_id', 'text', 'is_edited', 'created_at', 'updated_at']
+
+# 计算属性依赖的列，任一列变化就一起推送
+TASK_PROPERTIES = {
+    'status_color': {'status'},
+    'is_overdue': {'status', 'end_date'},
+}
+
+
+def task_group(pk):
+    return f'task.{pk}'
+
+
+def employee_group(pk):
+    return f'employee.{pk}'
+
+
+def json_safe(values):
+    """日期、时间转成与 REST 接口相同的字符串格式"""
+    return json.loads(json.dumps(values, cls=DjangoJSONEncoder))
+
+
+def diff_fields(instance, fields, created, update_fields=None):
+    """本次保存需要推送的列：新建时全部，否则只推送变化的列"""
+    if created:
+        return list(fields)
+    changed = instance.changed_fields()
+    if changed is None and update_fields is not None:
+        changed = [instance._meta.get_field(name).attname for name in update_fields]
+    if changed is None:
+        return list(fields)  # 不知道改了什么，推送全部
+    return [name for name in fields if name in changed]
+
+
+def task_event(task, op, fields=()):
+    """返回 (分组, 事件)；任务换了负责人时，原负责人的分组也会收到"""
+    values = {name: getattr(task, name) for name in fields}
+    for prop, columns in TASK_PROPERTIES.items():
+        if columns & set(fields):
+            values[prop] = getattr(task, prop)
+
+    loaded = getattr(task, '_loaded_values', None) or {}
+    employees = {
+        getattr(task, name) for name in ('employee_id', 'tester_id')
+    } | {loaded.get('employee_id'), loaded.get('tester_id')}
+    groups = [FEED_GROUP, task_group(task.pk)] + [employee_group(pk) for pk in employees if pk]
+    return groups, make_event('task', op, task.pk, values)
+
+
+def comment_event(comment, op, fields=()):
+    values = {name: getattr(comment, name) for name in fields}
+    employees = {comment.author_id}
+    task_field = comment._meta.get_field('task')
+    if task_field.is_cached(comment):
+        # 只在任务对象已经加载时才附带任务的负责人，不为推送额外查询
+        employees |= {comment.task.employee_id, comment.task.tester_id}
+    groups = [FEED_GROUP, task_group(comment.task_id)] + [employee_group(pk) for pk in employees if pk]
+    return groups, make_event('comment', op, comment.pk, values)
+
+
+def make_event(model, op, pk, values):
+    return {'id': uuid.uuid4().hex, 'model': model, 'op': op, 'pk': pk, 'fields': json_safe(values)}
+
+
+def publish(groups, event):
+    publish_many([(groups, event)])
+
+
+def publish_many(events):
+    """事务提交后再推送，客户端不会看到被回滚的变更；一批事件只切换一次到事件循环"""
+    layer = get_channel_layer()
+    if layer is None or not events:
+        return
+
+    async def send():
+        for groups, event in events:
+            for group in groups:
+                await layer.group_send(group, {'type': 'feed.event', 'event': event})
+
+    transaction.on_commit(async_to_sync(send))
@@ -0,0 +1,142 @@
+"""
+渲染器和解析器
+
+- FastJSONRenderer / FastJSONParser：用 orjson 编解码，格式与 DRF 的 JSONRenderer 相同（紧凑格式、不转义非 ASCII、
+  日期/Decimal 等类型交给 DRF 的 JSONEncoder）；浮点数除外，解析后的值相同但写法不同
+  （orjson 写 1e-6 / 1e16，json 模块写 1e-06 / 1e+16），NaN / Infinity 写成 null（DRF 直接报错）；settings.API_JSON_CAMEL_CASE 打开时键名在输出时转成 camelCase、
+  解析时转回 snake_case，每组键名的转换结果会缓存，同一个序列化器的每一行只查一次表
+- MessagePackRenderer / MessagePackParser：Accept / Content-Type 为 application/msgpack 时使用
+- 导出接口的渲染器：?format=csv / ?format=ndjson 由 DRF 的内容协商选中
+  正常情况下导出接口直接返回 StreamingHttpResponse，这里的 render 只用于错误响应（例如过滤参数无效）
+"""
+import re
+from functools import lru_cache
+
+import msgpack
+import orjson
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from .export import csv_lines, ndjson_lines
+
+# orjson 原生支持的类型里只有日期时间的格式与 DRF 不同（DRF 把 +00:00 写成 Z），交给 default 处理
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+encode_default = JSONEncoder().default
+
+CAMEL_RE = re.compile(r'(?<=[^_])_([a-z0-9])')
+SNAKE_RE = re.compile(r'(?<=[a-z0-9])([A-Z])')
+
+
+def camel_case_enabled():
+    return getattr(settings, 'API_JSON_CAMEL_CASE', False)
+
+
+def to_camel(key):
+    return CAMEL_RE.sub(lambda match: match.group(1).upper(), key) if isinstance(key, str) else key
+
+
+def to_snake(key):
+    return SNAKE_RE.sub(r'_\1', key).lower() if isinstance(key, str) else key
+
+
+@lru_cache(maxsize=1024)
+def camel_keys(keys):
+    """一组键名（即一个序列化器的字段集合）→ camelCase 键名"""
+    return tuple(to_camel(key) for key in keys)
+
+
+@lru_cache(maxsize=1024)
+def snake_keys(keys):
+    return tuple(to_snake(key) for key in keys)
+
+
+def rename_keys(data, mapping):
+    if isinstance(data, dict):
+        return dict(zip(mapping(tuple(data)), (rename_keys(value, mapping) for value in data.values())))
+    if isinstance(data, (list, tuple)):
+        return [rename_keys(item, mapping) for item in data]
+    return data
+
+
+def camelize(data):
+    return rename_keys(data, camel_keys)
+
+
+def underscoreize(data):
+    return rename_keys(data, snake_keys)
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if camel_case_enabled():
+            data = camelize(data)
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            # 带缩进的输出（可浏览 API、Accept: application/json; indent=4）不在热路径上，沿用 DRF 的实现
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            content = orjson.dumps(data, default=encode_default, option=ORJSON_OPTIONS)
+        except TypeError:  # orjson 不支持的值（例如超过 64 位的整数）
+            return super().render(data, accepted_media_type, renderer_context)
+        # 与 DRF 一致：U+2028 / U+2029 在 JavaScript 字符串里不合法，转义输出
+        return content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class FastJSONParser(JSONParser):
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            data = orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
+        return underscoreize(data) if camel_case_enabled() else data
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if camel_case_enabled():
+            data = camelize(data)
+        # 日期、Decimal 等与 JSON 输出一样编码成字符串
+        return msgpack.packb(data, default=encode_default, use_bin_type=True)
+
+
+class MessagePackParser(BaseParser):
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            data = msgpack.unpackb(stream.read(), raw=False)
+        except (ValueError, TypeError) as exc:
+            raise ParseError(f'MessagePack parse error - {exc}')
+        return underscoreize(data) if camel_case_enabled() else data
+
+
+class NDJSONRenderer(BaseRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        rows = data if isinstance(data, list) else [data]
+        return ''.join(ndjson_lines(rows)).encode(self.charset)
+
+
+class CSVRenderer(BaseRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        rows = data if isinstance(data, list) else [data]
+        fields = list(dict.fromkeys(name for row in rows for name in row))
+        return ''.join(csv_lines(rows, fields)).encode(self.charset)
@@ -0,0 +1,184 @@
+"""
+全文检索：Task.title/description 和 Comment.text
+
+- SQLite（开发）：FTS5 外部内容表 <table>_fts，由触发器与原表同步（bulk_create 也会同步）
+- PostgreSQL（生产）：to_tsvector 表达式上的 GIN 索引，查询用同一个表达式，索引随表自动更新
+- 其它数据库：退化为 icontains
+
+索引在每次 migrate 之后由 ensure_search_index() 补齐：SQLite 上重建表结构的迁移会丢掉触发器，
+发现触发器缺失时会自动 rebuild 一次
+"""
+import html
+import re
+from collections import namedtuple
+
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank, SearchVector
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import Task, Comment
+
+# 模型 -> 参与检索的列
+SEARCH_DOCUMENTS = {
+    Task: ['title', 'description'],
+    Comment: ['text'],
+}
+SEARCH_CONFIG = 'german'  # PostgreSQL 的文本检索配置（词干、停用词）
+HIGHLIGHT = ('<mark>', '</mark>')
+# 数据库先用私有区字符标记命中的词，转义片段之后再换成 <mark>：标题、评论里的 HTML 不会原样返回给前端
+MARKERS = ('\ue000', '\ue001')
+
+Hit = namedtuple('Hit', ['pk', 'rank', 'highlight'])
+
+
+def fts_table(model):
+    return f'{model._meta.db_table}_fts'
+
+
+def search_vector(model):
+    return SearchVector(*SEARCH_DOCUMENTS[model], config=SEARCH_CONFIG)
+
+
+def search_query(text):
+    return SearchQuery(text, search_type='websearch', config=SEARCH_CONFIG)
+
+
+def highlight(snippet):
+    """转义数据库返回的片段，再把标记换成 <mark>"""
+    if snippet is None:
+        return None
+    snippet = html.escape(snippet)
+    return snippet.replace(MARKERS[0], HIGHLIGHT[0]).replace(MARKERS[1], HIGHLIGHT[1])
+
+
+def fts5_match(text):
+    """把用户输入转成安全的 FTS5 查询：每个词加引号并做前缀匹配，词之间为 AND"""
+    return ' '.join(f'"{word}"*' for word in re.findall(r'\w+', text))
+
+
+# ---------- 索引维护 ----------
+
+def sqlite_triggers(model):
+    table, fts = model._meta.db_table, fts_table(model)
+    columns = SEARCH_DOCUMENTS[model]
+    names = ', '.join(columns)
+    new = ', '.join(f'new.{c}' for c in columns)
+    old = ', '.join(f'old.{c}' for c in columns)
+    return {
+        f'{fts}_ai': f'AFTER INSERT ON {table} BEGIN '
+                     f'INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new}); END',
+        f'{fts}_ad': f'AFTER DELETE ON {table} BEGIN '
+                     f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old}); END",
+        f'{fts}_au': f'AFTER UPDATE OF {names} ON {table} BEGIN '
+                     f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old}); "
+                     f'INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new}); END',
+    }
+
+
+def ensure_search_index(using='default', rebuild=False):
+    """创建缺失的检索索引（幂等），rebuild=True 时强制从原表重建"""
+    connection = connections[using]
+    tables = connection.introspection.table_names()
+
+    for model, columns in SEARCH_DOCUMENTS.items():
+        table = model._meta.db_table
+        if table not in tables:
+            continue
+
+        if connection.vendor == 'sqlite':
+            fts = fts_table(model)
+            triggers = sqlite_triggers(model)
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = %s", [table]
+                )
+                existing = {row[0] for row in cursor.fetchall()}
+                cursor.execute(
+                    f'CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5('
+                    f"{', '.join(columns)}, content='{table}', content_rowid='id', "
+                    f"tokenize='unicode61 remove_diacritics 2')"
+                )
+                for name, body in triggers.items():
+                    cursor.execute(f'CREATE TRIGGER IF NOT EXISTS {name} {body}')
+                if rebuild or not existing.issuperset(triggers):
+                    cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+        elif connection.vendor == 'postgresql':
+            name = f'{table}_search_gin'
+            with connection.cursor() as cursor:
+                constraints = connection.introspection.get_constraints(cursor, table)
+            if name not in constraints:
+                with connection.schema_editor() as editor:
+                    editor.add_index(model, GinIndex(search_vector(model), name=name))
+
+
+# ---------- 查询 ----------
+
+def search(model, text, limit=20, queryset=None, using='default'):
+    """按相关度返回 [Hit(pk, rank, highlight)]，rank 越大越相关，highlight 为 {列: 已转义、带 <mark> 的 HTML 片段}"""
+    columns = SEARCH_DOCUMENTS[model]
+    vendor = connections[using].vendor
+
+    if vendor == 'sqlite':
+        match = fts5_match(text)
+        if not match:
+            return []
+        fts = fts_table(model)
+        snippets = ', '.join(
+            f"snippet({fts}, {i}, '{MARKERS[0]}', '{MARKERS[1]}', '…', 24)" for i in range(len(columns))
+        )
+        sql = f'SELECT rowid, bm25({fts}), {snippets} FROM {fts} WHERE {fts} MATCH %s'
+        params = [match]
+        if queryset is not None:
+            subquery, sub_params = queryset.order_by().values('pk').query.sql_with_params()
+            sql += f' AND rowid IN ({subquery})'
+            params += list(sub_params)
+        sql += ' ORDER BY bm25({}) LIMIT %s'.format(fts)
+        params.append(limit)
+        with connections[using].cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        # bm25 越小越相关，取反后与 PostgreSQL 的 ts_rank 方向一致
+        return [Hit(row[0], -row[1], dict(zip(columns, map(highlight, row[2:])))) for row in rows]
+
+    queryset = model.objects.all() if queryset is None else queryset
+    if vendor == 'postgresql':
+        query = search_query(text)
+        vector = search_vector(model)
+        headlines = {
+            f'headline_{c}': SearchHeadline(
+                c, query, config=SEARCH_CONFIG, start_sel=MARKERS[0], stop_sel=MARKERS[1]
+            ) for c in columns
+        }
+        rows = queryset.annotate(search=vector, rank=SearchRank(vector, query)).filter(
+            search=query
+        ).order_by('-rank').annotate(**headlines).values('pk', 'rank', *headlines)[:limit]
+        return [Hit(row['pk'], row['rank'], {c: highlight(row[f'headline_{c}']) for c in columns}) for row in rows]
+
+    # 其它数据库：没有索引的兜底实现
+    condition = Q()
+    for column in columns:
+        condition |= Q(**{f'{column}__icontains': text})
+    rows = queryset.filter(condition).values('pk', *columns)[:limit]
+    return [Hit(row['pk'], 0, {c: highlight(row[c]) for c in columns}) for row in rows]
+
+
+def filter_matching(queryset, text, using='default'):
+    """把 queryset 限制为全文匹配的记录（不排序），供列表接口的 ?q= 使用"""
+    model = queryset.model
+    vendor = connections[using].vendor
+    if vendor == 'sqlite':
+        match = fts5_match(text)
+        if not match:
+            return queryset.none()
+        fts = fts_table(model)
+        return queryset.filter(pk__in=RawSQL(f'SELECT rowid FROM {fts} WHERE {fts} MATCH %s', [match]))
+    if vendor == 'postgresql':
+        return queryset.annotate(search=search_vector(model)).filter(search=search_query(text))
+
+    condition = Q()
+    for column in SEARCH_DOCUMENTS[model]:
+        condition |= Q(**{f'{column}__icontains': text})
+    return queryset.filter(condition)
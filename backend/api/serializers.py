@@ -1,30 +1,218 @@
+from collections import defaultdict
+from collections.abc import Mapping
+from functools import cached_property, partial
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
 from rest_framework import serializers
-from .models import Task, Employee, Comment
+from .models import Task, Employee, Comment, ArchivedTask, ArchivedComment, Job
+from .profiling import section
+
+
+class TimedListSerializer(serializers.ListSerializer):
+    """many=True 时使用：序列化耗时计入请求统计（API_PROFILING）"""
+
+    @property
+    def data(self):
+        with section('serialize'):
+            return super().data
+
+
+class RelatedObjects:
+    """
+    一个请求里按主键解析过的外键对象：{(模型, 查询): {pk: 对象或 None}}
+    第一次解析时把整批数据里引用的 ID 收集起来，每个模型只做一次 in_bulk 查询
+    """
+
+    def __init__(self):
+        self.objects = defaultdict(dict)
+        self.prefetched = set()  # 已经收集过 ID 的根序列化器
+
+    def load(self, key, queryset, ids):
+        cached = self.objects[key]
+        missing = [pk for pk in ids if pk not in cached]
+        if missing:
+            found = queryset.in_bulk(missing)
+            for pk in missing:
+                cached[pk] = found.get(pk)
+        return cached
+
+    def prefetch(self, root):
+        if id(root) in self.prefetched:
+            return
+        self.prefetched.add(id(root))
+        serializer = getattr(root, 'child', root)
+        rows = getattr(root, 'initial_data', None)
+        rows = rows if isinstance(rows, list) else [rows]
+        fields = [
+            field for field in getattr(serializer, 'fields', {}).values()
+            if isinstance(field, BulkPrimaryKeyRelatedField) and not field.read_only
+        ]
+        ids = defaultdict(set)
+        querysets = {}
+        for field in fields:
+            querysets.setdefault(field.cache_key, field.get_queryset())
+            for row in rows:
+                if isinstance(row, Mapping) and row.get(field.field_name) is not None:
+                    pk = field.parse_pk(row[field.field_name])
+                    if pk is not None:
+                        ids[field.cache_key].add(pk)
+        for key, pks in ids.items():
+            self.load(key, querysets[key], pks)
+
+
+def related_objects(serializer):
+    """缓存放在请求上（没有请求时放在根序列化器上），同一个请求里的多个序列化器共用"""
+    root = serializer.root
+    holder = serializer.context.get('request') or root
+    objects = getattr(holder, '_related_objects', None)
+    if objects is None:
+        objects = holder._related_objects = RelatedObjects()
+    objects.prefetch(root)
+    return objects
+
+
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    与 PrimaryKeyRelatedField 相同，但不是每个值查一次数据库：
+    整个请求（many=True 时整批）引用的 ID 按模型一次 in_bulk 校验，不存在的 ID 返回 400
+    """
+
+    @cached_property
+    def cache_key(self):
+        return self.queryset.model, str(self.queryset.query)
+
+    def parse_pk(self, data):
+        if isinstance(data, bool):
+            return None
+        try:
+            return self.queryset.model._meta.pk.to_python(data)
+        except DjangoValidationError:
+            return None
+
+    def to_internal_value(self, data):
+        pk = self.parse_pk(data)
+        if pk is None:
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        obj = related_objects(self).load(self.cache_key, self.get_queryset(), [pk]).get(pk)
+        if obj is None:
+            self.fail('does_not_exist', pk_value=data)
+        return obj
+
+
+class DynamicFieldsMixin:
+    """
+    支持按请求裁剪字段：
+    - fields: 只保留这些字段（例如 ?fields=id,title）
+    - expand: 把 Meta.expandable 中声明的关联替换/追加为嵌套对象（例如 ?expand=employee）
+    Meta.column_map 声明非模型字段（property、方法字段）依赖的数据库列，用于 queryset.only()
+    """
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        expand = kwargs.pop('expand', None) or []
+        super().__init__(*args, **kwargs)
 
-class EmployeeSerializer(serializers.ModelSerializer):
+        expandable = getattr(self.Meta, 'expandable', {})
+        for name in expand:
+            if name in expandable:
+                self.fields[name] = expandable[name]()
+
+        if fields:
+            unknown = [name for name in fields if name not in self.fields]
+            if unknown:
+                # 拼错的字段名不能悄悄忽略，否则客户端拿到一列空对象
+                raise serializers.ValidationError({'fields': [f"Unbekannte Felder: {', '.join(unknown)}"]})
+            allowed = set(fields) | set(expand)
+            for name in list(self.fields):
+                if name not in allowed:
+                    self.fields.pop(name)
+
+    @property
+    def data(self):
+        with section('serialize'):
+            return super().data
+
+    def get_query_plan(self):
+        """根据当前字段推导查询：返回 (only 列, select_related, prefetch_related)"""
+        model = self.Meta.model
+        column_map = getattr(self.Meta, 'column_map', {})
+        columns, related, prefetch = {'id'}, set(), set()
+
+        for name, field in self.fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.ListSerializer):
+                # 反向关联（comments）单独预加载，父对象只需要 column_map 里的列
+                prefetch.add(field.source)
+                columns.update(column_map.get(name, []))
+            elif name in column_map:
+                for column in column_map[name]:
+                    columns.add(column)
+                    if '__' in column:
+                        related.add(column.split('__')[0])
+            elif isinstance(field, DynamicFieldsMixin):
+                nested_columns, _, _ = field.get_query_plan()
+                columns.update(f'{field.source}__{column}' for column in nested_columns)
+                related.add(field.source)
+            elif field.source_attrs:
+                try:
+                    model_field = model._meta.get_field(field.source_attrs[0])
+                except FieldDoesNotExist:
+                    continue
+                if model_field.concrete:
+                    columns.add(model_field.name)
+
+        return sorted(columns), sorted(related), sorted(prefetch)
+
+
+class EmployeeSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     full_name = serializers.ReadOnlyField()  # 使用定义的 property
     class Meta:
         model = Employee
+        list_serializer_class = TimedListSerializer
         fields = ['id', 'firstname', 'lastname', 'full_name', 'role', 'department', 'is_active']
+        column_map = {'full_name': ['firstname', 'lastname']}
+
+class EmployeeWorkloadSerializer(EmployeeSerializer):
+    """/api/employees/ 的表示：附带 EmployeeWorkload 汇总表里的任务计数（一次 JOIN，不按员工 COUNT 任务）"""
+    open_tasks = serializers.ReadOnlyField(source='workload.open_tasks')
+    overdue_tasks = serializers.ReadOnlyField(source='workload.overdue_tasks')
+    completed_tasks = serializers.ReadOnlyField(source='workload.completed_tasks')
+    open_tests = serializers.ReadOnlyField(source='workload.open_tests')
+    class Meta(EmployeeSerializer.Meta):
+        fields = EmployeeSerializer.Meta.fields + ['open_tasks', 'overdue_tasks', 'completed_tasks', 'open_tests']
+        column_map = {
+            **EmployeeSerializer.Meta.column_map,
+            'open_tasks': ['workload__open_tasks'],
+            'overdue_tasks': ['workload__overdue_tasks'],
+            'completed_tasks': ['workload__completed_tasks'],
+            'open_tests': ['workload__open_tests'],
+        }
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
 # 方法：使用库自动转换 - 全部用 snake_case
 
     task_title = serializers.SerializerMethodField()
     author_name = serializers.SerializerMethodField()
-    task_id = serializers.PrimaryKeyRelatedField(
+    task_id = BulkPrimaryKeyRelatedField(
         source='task',           # 指向 Model 中的 task 字段
         queryset=Task.objects.all(),        
     )
-    author_id = serializers.PrimaryKeyRelatedField(
+    author_id = BulkPrimaryKeyRelatedField(
         source='author',           # 指向 Model 中的 author 字段
         queryset=Employee.objects.all(),        
     )
     
     class Meta:
         model = Comment
+        list_serializer_class = TimedListSerializer
         fields = ['id', 'task_id','task_title', 'text', 'author_id','author_name', 'is_edited', 'created_at', 'updated_at']
         read_only_fields = ['created_at', 'updated_at']
+        expandable = {'author': partial(EmployeeSerializer, read_only=True)}
+        column_map = {
+            'task_title': ['task__title'],
+            'author_name': ['author__firstname', 'author__lastname'],
+        }
 
     def get_task_title(self, obj):     # 方法名：snake_case
         return obj.task.title
@@ -33,7 +221,15 @@ class CommentSerializer(serializers.ModelSerializer):
         return obj.author.full_name if obj.author else "Unbekannt" 
     
         
-class TaskSerializer(serializers.ModelSerializer):
+# Task 上 property 依赖的列
+TASK_PROPERTY_COLUMNS = {
+    'status_color': ['status'],
+    'is_overdue': ['status', 'end_date'],
+    'comments': ['title'],  # 嵌套评论的 task_title 读取父任务的 title
+}
+
+
+class TaskSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     # 嵌套序列化 - 读取时返回完整对象
     employee = EmployeeSerializer(read_only=True)  # 用于读取（GET）
     tester = EmployeeSerializer(read_only=True)
@@ -41,11 +237,11 @@ class TaskSerializer(serializers.ModelSerializer):
     updated_by = EmployeeSerializer(read_only=True)
     comments = CommentSerializer(many=True, read_only=True)
 
-    # 写入时只接收 ID
-    employee_id = serializers.IntegerField(write_only=True, required=False, allow_null=True) # 用于写入（POST/PUT/PATCH）
-    tester_id = serializers.IntegerField(write_only=True, required=False, allow_null=True)
-    created_by_id = serializers.IntegerField(write_only=True, required=False, allow_null=True)
-    updated_by_id = serializers.IntegerField(write_only=True, required=False, allow_null=True)
+    # 写入时只接收 ID（校验员工存在，validated_data 里是员工对象）
+    employee_id = BulkPrimaryKeyRelatedField(source='employee', queryset=Employee.objects.all(), write_only=True, required=False, allow_null=True) # 用于写入（POST/PUT/PATCH）
+    tester_id = BulkPrimaryKeyRelatedField(source='tester', queryset=Employee.objects.all(), write_only=True, required=False, allow_null=True)
+    created_by_id = BulkPrimaryKeyRelatedField(source='created_by', queryset=Employee.objects.all(), write_only=True, required=False, allow_null=True)
+    updated_by_id = BulkPrimaryKeyRelatedField(source='updated_by', queryset=Employee.objects.all(), write_only=True, required=False, allow_null=True)
     
     # 计算属性字段
     status_color = serializers.CharField(read_only=True)
@@ -53,6 +249,7 @@ class TaskSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Task
+        list_serializer_class = TimedListSerializer
         fields = [
             'id', 
             'title', 
@@ -71,11 +268,210 @@ class TaskSerializer(serializers.ModelSerializer):
             'updated_by_id',
             'version',
             'comments',
+            'comment_count',
+            'last_comment_at',
             'status_color',
             'is_overdue',
             'created_at',
             'updated_at'
         ]
-        read_only_fields = ['created_at', 'updated_at','status_color', 'is_overdue']
-    
-    
\ No newline at end of file
+        read_only_fields = ['created_at', 'updated_at','status_color', 'is_overdue', 'comment_count', 'last_comment_at']
+        column_map = TASK_PROPERTY_COLUMNS
+
+
+class TaskSummarySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """列表用的精简表示：关联员工只返回扁平的 ID 和姓名，评论只有数量和最近时间"""
+    employee_id = serializers.IntegerField(read_only=True)
+    employee_name = serializers.SerializerMethodField()
+    tester_id = serializers.IntegerField(read_only=True)
+    tester_name = serializers.SerializerMethodField()
+    status_color = serializers.CharField(read_only=True)
+    is_overdue = serializers.BooleanField(read_only=True)
+
+    class Meta:
+        model = Task
+        list_serializer_class = TimedListSerializer
+        fields = [
+            'id',
+            'title',
+            'status',
+            'priority',
+            'start_date',
+            'end_date',
+            'employee_id',
+            'employee_name',
+            'tester_id',
+            'tester_name',
+            'status_color',
+            'is_overdue',
+            'comment_count',
+            'last_comment_at',
+            'created_at',
+            'updated_at'
+        ]
+        read_only_fields = fields
+        # ?expand= 可以按需取回完整的嵌套对象
+        expandable = {
+            'employee': partial(EmployeeSerializer, read_only=True),
+            'tester': partial(EmployeeSerializer, read_only=True),
+            'created_by': partial(EmployeeSerializer, read_only=True),
+            'updated_by': partial(EmployeeSerializer, read_only=True),
+            'comments': partial(CommentSerializer, many=True, read_only=True),
+        }
+        column_map = {
+            **TASK_PROPERTY_COLUMNS,
+            'employee_name': ['employee__firstname', 'employee__lastname'],
+            'tester_name': ['tester__firstname', 'tester__lastname'],
+        }
+
+    def get_employee_name(self, obj):
+        return obj.employee.full_name if obj.employee else None
+
+    def get_tester_name(self, obj):
+        return obj.tester.full_name if obj.tester else None
+
+
+class TaskBulkUpdateSerializer(TaskSerializer):
+    """批量更新中的一条：必须带 id，其余字段与 PATCH 一样可选"""
+    id = serializers.IntegerField(min_value=1)
+
+    def validate(self, attrs):
+        if 'id' not in attrs:
+            raise serializers.ValidationError({'id': ['This field is required.']})
+        return attrs
+
+
+class BulkIdsSerializer(serializers.Serializer):
+    """批量接口的 {"ids": [...]}"""
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False)
+
+
+class BulkStatusSerializer(BulkIdsSerializer):
+    """批量状态流转 {"ids": [...], "status": "archiviert"}"""
+    status = serializers.ChoiceField(choices=Task._meta.get_field('status').choices)
+
+
+class ArchivedCommentSerializer(serializers.ModelSerializer):
+    author_id = serializers.ReadOnlyField()
+
+    class Meta:
+        model = ArchivedComment
+        fields = ['id', 'author_id', 'text', 'is_edited', 'created_at', 'updated_at']
+
+
+class ArchivedTaskSerializer(serializers.ModelSerializer):
+    """归档表里的任务（只读），员工只返回 ID"""
+    employee_id = serializers.ReadOnlyField()
+    tester_id = serializers.ReadOnlyField()
+    created_by_id = serializers.ReadOnlyField()
+    updated_by_id = serializers.ReadOnlyField()
+
+    class Meta:
+        model = ArchivedTask
+        fields = [
+            'id', 'title', 'description', 'status', 'priority', 'start_date', 'end_date',
+            'employee_id', 'tester_id', 'created_by_id', 'updated_by_id', 'version',
+            'comment_count', 'last_comment_at', 'created_at', 'updated_at', 'archived_at',
+        ]
+        read_only_fields = fields
+
+
+class ArchivedTaskDetailSerializer(ArchivedTaskSerializer):
+    comments = ArchivedCommentSerializer(many=True, read_only=True)
+
+    class Meta(ArchivedTaskSerializer.Meta):
+        fields = ArchivedTaskSerializer.Meta.fields + ['comments']
+
+
+# ---------- 后台任务 ----------
+
+class ImportJobParamsSerializer(serializers.Serializer):
+    model = serializers.ChoiceField(choices=['task', 'employee', 'comment'])
+    rows = serializers.ListField(child=serializers.DictField(), allow_empty=False)
+    batch_size = serializers.IntegerField(min_value=1, max_value=10000, default=1000)
+
+    # import_data 直接用 item[...] 读取的键，缺少时整个任务会在 worker 里失败
+    required_keys = {
+        'employee': ('id', 'firstname', 'lastname'),
+        'task': ('title', 'start_date', 'end_date'),
+        'comment': ('task', 'text'),
+    }
+    # 按模型字段校验的键（格式、choices、长度、NULL），与 import_data 写入的列对应
+    field_keys = {
+        'employee': (Employee, ('firstname', 'lastname', 'role', 'department', 'is_active')),
+        'task': (Task, ('title', 'description', 'status', 'priority', 'start_date', 'end_date', 'version')),
+        'comment': (Comment, ('text',)),
+    }
+    # ID 和外键：import_data 按整数比较，"5" 这样的字符串会被当成不存在
+    id_keys = {
+        'employee': ('id',),
+        'task': ('id', 'employee_id', 'tester_id', 'created_by_id'),
+        'comment': ('task', 'author'),
+    }
+    max_row_errors = 20  # 只报告前几行的错误，响应不会随数据量变大
+
+    def row_errors(self, model, row):
+        errors = {}
+        for key in self.required_keys[model]:
+            if row.get(key) in (None, ''):
+                errors[key] = ['This field is required.']
+        model_class, keys = self.field_keys[model]
+        for key in keys:
+            if key in row and key not in errors:
+                try:
+                    model_class._meta.get_field(key).clean(row[key], None)
+                except DjangoValidationError as e:
+                    errors[key] = e.messages
+        for key in self.id_keys[model]:
+            value = row.get(key)
+            if key not in errors and value is not None and (isinstance(value, bool) or not isinstance(value, int)):
+                errors[key] = ['A valid integer is required.']
+        return errors
+
+    def validate(self, attrs):
+        errors = {}
+        for index, row in enumerate(attrs['rows']):
+            row_errors = self.row_errors(attrs['model'], row)
+            if row_errors:
+                errors[index] = row_errors
+                if len(errors) >= self.max_row_errors:
+                    break
+        if errors:
+            raise serializers.ValidationError({'rows': errors})
+        return attrs
+
+
+class ExportJobParamsSerializer(serializers.Serializer):
+    format = serializers.ChoiceField(choices=['csv', 'ndjson', 'json'], default='ndjson')
+    comments = serializers.BooleanField(default=True)
+    filters = serializers.DictField(child=serializers.CharField(), default=dict)  # 与 /api/tasks/ 的过滤参数相同
+
+    def validate_filters(self, value):
+        from .jobs import filtered_tasks
+        filtered_tasks(value)  # 参数无效时在提交时就返回 400
+        return value
+
+
+class JobSerializer(serializers.ModelSerializer):
+    """POST /api/jobs/ 提交 {"kind": ..., "params": {...}}；params 只写不读（导入任务的数据可能很大）"""
+    params_serializers = {
+        'import': ImportJobParamsSerializer,
+        'export': ExportJobParamsSerializer,
+        'rebuild_stats': serializers.Serializer,
+    }
+    params = serializers.JSONField(write_only=True, required=False, default=dict)
+    progress = serializers.ReadOnlyField()
+
+    class Meta:
+        model = Job
+        fields = ['id', 'kind', 'status', 'params', 'progress', 'processed', 'total', 'result', 'error',
+                  'created_at', 'started_at', 'finished_at']
+        read_only_fields = ['status', 'processed', 'total', 'result', 'error', 'created_at', 'started_at',
+                            'finished_at']
+
+    def validate(self, attrs):
+        params = self.params_serializers[attrs['kind']](data=attrs.get('params') or {})
+        if not params.is_valid():
+            raise serializers.ValidationError({'params': params.errors})
+        attrs['params'] = dict(params.validated_data)
+        return attrs
@@ -0,0 +1,93 @@
+from django.db.models import F
+from django.db.models.signals import pre_save, post_save, post_delete
+
+from .cache import bump_generation_on_commit
+from .models import Task, Employee, Comment, EmployeeWorkload
+from .realtime import COMMENT_FIELDS, TASK_FIELDS, comment_event, diff_fields, publish, task_event
+from .workload import apply_delta, loaded_values, task_values
+
+
+def invalidate_cache(sender, **kwargs):
+    """任何保存/删除都让该模型相关的缓存失效（事务提交之后）"""
+    bump_generation_on_commit(sender, using=kwargs.get('using'))
+
+
+for model in (Task, Employee, Comment):
+    post_save.connect(invalidate_cache, sender=model, dispatch_uid=f'invalidate_cache_save_{model.__name__}')
+    post_delete.connect(invalidate_cache, sender=model, dispatch_uid=f'invalidate_cache_delete_{model.__name__}')
+
+
+# 评论统计：新建 +1 并记录时间，删除 -1 并从剩余评论中取最新时间（走 (task, -created_at) 索引）
+def count_comment_saved(sender, instance, created, **kwargs):
+    if created:
+        Task.objects.filter(pk=instance.task_id).update(
+            comment_count=F('comment_count') + 1, last_comment_at=instance.created_at
+        )
+        return
+    loaded = getattr(instance, '_loaded_values', None) or {}
+    if loaded.get('task_id') not in (None, instance.task_id):
+        # 评论被移到了另一个任务，两边都重新计算
+        Task.objects.filter(pk__in=[loaded['task_id'], instance.task_id]).refresh_comment_stats()
+
+
+def count_comment_deleted(sender, instance, origin=None, **kwargs):
+    # 随任务级联删除（origin 是 Task 或 Task 的 QuerySet）：任务也会被删除，不需要逐条更新统计
+    if isinstance(origin, Task) or getattr(origin, 'model', None) is Task:
+        return
+    latest = Comment.objects.filter(task=instance.task_id).order_by('-created_at').values('created_at')[:1]
+    Task.objects.filter(pk=instance.task_id, comment_count__gt=0).update(
+        comment_count=F('comment_count') - 1, last_comment_at=latest
+    )
+
+
+post_save.connect(count_comment_saved, sender=Comment, dispatch_uid='count_comment_saved')
+post_delete.connect(count_comment_deleted, sender=Comment, dispatch_uid='count_comment_deleted')
+
+
+# 实时推送：只推送前端关心且确实变化了的字段
+FEED = {
+    Task: (task_event, TASK_FIELDS),
+    Comment: (comment_event, COMMENT_FIELDS),
+}
+
+
+def publish_save(sender, instance, created, update_fields=None, **kwargs):
+    build, fields = FEED[sender]
+    changed = diff_fields(instance, fields, created, update_fields)
+    if created or set(changed) - {'updated_at'}:
+        publish(*build(instance, 'created' if created else 'updated', changed))
+
+
+def publish_delete(sender, instance, **kwargs):
+    build, _ = FEED[sender]
+    publish(*build(instance, 'deleted'))
+
+
+for model in FEED:
+    post_save.connect(publish_save, sender=model, dispatch_uid=f'publish_save_{model.__name__}')
+    post_delete.connect(publish_delete, sender=model, dispatch_uid=f'publish_delete_{model.__name__}')
+
+
+# 员工工作量汇总：保存前记下任务原来的贡献，保存/删除后只更新差值
+def remember_workload(sender, instance, raw=False, **kwargs):
+    instance._workload_before = None if raw or instance._state.adding else loaded_values(instance)
+
+
+def update_workload_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        apply_delta(getattr(instance, '_workload_before', None), task_values(instance))
+
+
+def update_workload_deleted(sender, instance, **kwargs):
+    apply_delta(task_values(instance), None)
+
+
+def create_workload(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        EmployeeWorkload.objects.get_or_create(employee=instance)
+
+
+pre_save.connect(remember_workload, sender=Task, dispatch_uid='remember_workload')
+post_save.connect(update_workload_saved, sender=Task, dispatch_uid='update_workload_saved')
+post_delete.connect(update_workload_deleted, sender=Task, dispatch_uid='update_workload_deleted')
+post_save.connect(create_workload, sender=Employee, dispatch_uid='create_workload')
@@ -1,16 +1,24 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import TaskViewSet, EmployeeViewSet, CommentViewSet
+from . import async_views
+from .views import TaskViewSet, EmployeeViewSet, CommentViewSet, ArchivedTaskViewSet, JobViewSet
 
 router = DefaultRouter()
 router.register(r'tasks', TaskViewSet) #没有 queryset → Router 不知道 URL name 的前缀, 所以在urls.py使用 basename
 router.register(r'employees', EmployeeViewSet) #r'employees'--URL path 的前缀，如 /employees/
 router.register(r'comments', CommentViewSet)
+router.register(r'archive/tasks', ArchivedTaskViewSet)  # 冷数据（归档表）
+router.register(r'jobs', JobViewSet)  # 后台任务
 
 urlpatterns = [
-     # 🔥 自定义路径必须放在 router 之前（更具体的路由优先）
-    path('tasks/status/<str:status>/', TaskViewSet.as_view({'get': 'list_by_status'}), name='tasks-by-status'),
-    path('tasks/department/<str:department>/', TaskViewSet.as_view({'get': 'list_by_department'}), name='tasks-by-department'),
+     # 🔥 自定义路径必须放在 router 之前（更具体的路由优先）；basename 与 router 一致，缓存指标才归到同一个 view
+    path('tasks/status/<str:status>/', TaskViewSet.as_view({'get': 'list_by_status'}, basename='task'), name='tasks-by-status'),
+    path('tasks/department/<str:department>/', TaskViewSet.as_view({'get': 'list_by_department'}, basename='task'), name='tasks-by-department'),
+
+    # 异步只读接口（ASGI 下不占用线程池）
+    path('async/tasks/', async_views.task_list, name='async-task-list'),
+    path('async/tasks/<int:pk>/', async_views.task_detail, name='async-task-detail'),
+    path('async/tasks/<int:pk>/comments/', async_views.task_comments, name='async-task-comments'),
 
     path('', include(router.urls)),
     
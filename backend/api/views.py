@@ -1,58 +1,391 @@
 
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import render
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
-from rest_framework import viewsets, filters
-from .models import Task, Employee, Comment
-from .serializers import TaskSerializer, EmployeeSerializer, CommentSerializer
+from django.db import transaction
+from django.db.models import Count, F, Prefetch, Q
+from django.utils import timezone
+from rest_framework import status as http_status, mixins, viewsets, filters
+from .models import Task, Employee, Comment, ArchivedTask, Job, JOB_SUCCEEDED, STATUS_CHOICES, PRIORITY_CHOICES, CLOSED_STATUSES, overdue_q
+from .archive import delete_ids, restore_tasks
+from .cache import ConditionalGetMixin, bump_generation_on_commit
+from .jobs import cancel as cancel_job, job_file
+from .filters import ActiveTaskFilter, FullTextSearchFilter, TaskFilterBackend, TaskOrderingFilter
+from .export import TASK_FIELDS as EXPORT_TASK_FIELDS, async_chunks, encode, export_tasks
+from .pagination import CreatedAtCursorPagination
+from .profiling import prometheus_text
+from .realtime import TASK_FIELDS, publish_many, task_event
+from .renderers import CSVRenderer, NDJSONRenderer
+from .search import search
+from .workload import COUNTERS as WORKLOAD_COUNTERS, rebuild_workload
+from .serializers import (
+    TaskSerializer, TaskSummarySerializer, TaskBulkUpdateSerializer, BulkIdsSerializer, BulkStatusSerializer,
+    EmployeeWorkloadSerializer, CommentSerializer, ArchivedTaskSerializer, ArchivedTaskDetailSerializer,
+    JobSerializer,
+)
 
+MAX_BULK_ITEMS = 1000  # 批量接口单次请求最多处理的任务数
+BULK_BATCH_SIZE = 500  # bulk_create / bulk_update 每条 SQL 的行数
 
 
-class EmployeeViewSet(viewsets.ModelViewSet):
+def task_prefetch(name):
+    if name == 'comments':
+        # 评论连同作者一次性预加载，comment.task 由 Django 自动回填为父任务对象
+        return Prefetch('comments', queryset=Comment.objects.select_related('author'))
+    return name
+
+
+def assignees(tasks):
+    """任务的负责人和测试人 ID（批量写入后只重新计算这些员工的工作量）"""
+    return {pk for task in tasks for pk in (task.employee_id, task.tester_id) if pk}
+
+
+def search_params(request):
+    """全文检索接口的 q 和 limit 参数（limit 默认 20，最多 100）"""
+    text = request.query_params.get('q', '').strip()
+    try:
+        limit = min(max(int(request.query_params.get('limit', 20)), 1), 100)
+    except ValueError:
+        limit = 20
+    return text, limit
+
+
+class FieldSelectionMixin:
+    """
+    GET 请求支持 ?fields=id,title 和 ?expand=employee：
+    只序列化请求的字段，并且 queryset 只加载这些字段需要的列
+    写操作（POST/PUT/PATCH）始终使用完整的 serializer
+    """
+
+    def get_query_list(self, name):
+        value = self.request.query_params.get(name)
+        if not value:
+            return None
+        return [item.strip() for item in value.split(',') if item.strip()]
+
+    def get_serializer(self, *args, **kwargs):
+        if self.request.method == 'GET':
+            kwargs.setdefault('fields', self.get_query_list('fields'))
+            kwargs.setdefault('expand', self.get_query_list('expand'))
+        return super().get_serializer(*args, **kwargs)
+
+    def get_prefetch(self, name):
+        return name
+
+    def get_ordering_columns(self, queryset):
+        """排序（以及游标分页定位）用到的列，即使没有被请求也必须加载"""
+        for backend in self.filter_backends:
+            if hasattr(backend, 'get_ordering'):
+                ordering = backend().get_ordering(self.request, queryset, self)
+                break
+        else:
+            ordering = getattr(self.pagination_class, 'ordering', None)
+        if isinstance(ordering, str):
+            ordering = [ordering]
+        return [field.lstrip('-') for field in ordering or []]
+
+    def select_columns(self, queryset):
+        """按本次请求的字段裁剪查询：select_related + prefetch_related + only"""
+        columns, related, prefetch = self.get_serializer().get_query_plan()
+        columns += self.get_ordering_columns(queryset)
+        return queryset.select_related(*related).prefetch_related(
+            *[self.get_prefetch(name) for name in prefetch]
+        ).only(*columns)
+
+
+class EmployeeViewSet(ConditionalGetMixin, FieldSelectionMixin, viewsets.ModelViewSet):
     queryset = Employee.objects.all()   #没有 queryset → Router 不知道 URL 名, 所以在urls.py使用 basename
-    serializer_class = EmployeeSerializer
+    serializer_class = EmployeeWorkloadSerializer
+    cache_models = (Employee, Task)  # 工作量计数随任务变化
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['firstname', 'lastname', 'department']
-    ordering_fields = ['lastname', 'firstname', 'role']
+    ordering_fields = ['lastname', 'firstname', 'role', *WORKLOAD_COUNTERS]  # ?ordering=-open_tasks
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method == 'GET':
+            # 工作量排序用别名，按汇总表的列排序
+            queryset = self.select_columns(queryset).alias(
+                **{name: F(f'workload__{name}') for name in WORKLOAD_COUNTERS}
+            )
+        return queryset
 
-class TaskViewSet(viewsets.ModelViewSet):
+    def get_ordering_columns(self, queryset):
+        # 别名只用于 ORDER BY，不需要加载
+        return [name for name in super().get_ordering_columns(queryset) if name not in WORKLOAD_COUNTERS]
+
+
+class TaskViewSet(ConditionalGetMixin, FieldSelectionMixin, viewsets.ModelViewSet):
     queryset = Task.objects.all()
     serializer_class = TaskSerializer
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]   
-    search_fields = ['title', 'department', 'employee']
-    ordering_fields = ['created_at', 'start_date', 'priority']
-    ordering = ['-created_at']  # 默认排序
+    cache_models = (Task, Employee, Comment)  # 响应里嵌套了员工姓名和（expand 时的）评论
+    pagination_class = CreatedAtCursorPagination
+    filter_backends = [
+        TaskFilterBackend, ActiveTaskFilter, FullTextSearchFilter, filters.SearchFilter, TaskOrderingFilter,
+    ]
+    search_fields = ['title', 'employee__firstname', 'employee__lastname', 'employee__department']
+    ordering_fields = ['created_at', 'start_date', 'priority', 'comment_count', 'last_comment_at']
+    ordering = ['-created_at', 'id']  # 默认排序，id 让游标分页稳定
+
+    def get_serializer_class(self):
+        # 列表只返回精简表示，详情和写操作使用完整的 TaskSerializer
+        if self.action in ('list', 'list_by_status', 'list_by_department'):
+            return TaskSummarySerializer
+        return TaskSerializer
+
+    def get_prefetch(self, name):
+        return task_prefetch(name)
 
     # 可选：支持前端通过 URL 参数过滤
     def get_queryset(self):
-         # 🔥 关键优化: select_related 预加载关联对象
+        if self.request.method == 'GET':
+            # 🔥 关键优化: 只 JOIN / 预加载 / 查询本次请求需要的列
+            return self.select_columns(Task.objects.all())
+
         queryset = Task.objects.select_related(
             'created_by',  # 如果是 ForeignKey
             'employee',
             'tester',
             'updated_by'    
-        ).all()
+        ).prefetch_related(self.get_prefetch('comments'))
         return queryset
         
+    @action(detail=False, methods=['get'])
+    def stats(self, request):
+        """
+        GET /api/tasks/stats/ - 仪表盘统计，全部在 SQL 里聚合
+        支持与列表相同的过滤参数（status、employee、department、overdue ...）
+        """
+        queryset = self.filter_queryset(Task.objects.all()).order_by()
+
+        # 一条 aggregate 同时算出总数、过期数、各状态和各优先级的数量
+        totals = queryset.aggregate(
+            total=Count('id'),
+            overdue=Count('id', filter=overdue_q()),
+            **{f'status_{s.key}': Count('id', filter=Q(status=s.key)) for s in STATUS_CHOICES},
+            **{f'priority_{key}': Count('id', filter=Q(priority=key)) for key, _ in PRIORITY_CHOICES},
+        )
+        # 一条 GROUP BY 算出每个负责人的工作量
+        workload = queryset.filter(employee__isnull=False).values(
+            'employee_id', 'employee__firstname', 'employee__lastname'
+        ).annotate(
+            total=Count('id'),
+            open=Count('id', filter=~Q(status__in=CLOSED_STATUSES)),
+            overdue=Count('id', filter=overdue_q()),
+        ).order_by('-total', 'employee_id')
+
+        return Response({
+            'total': totals['total'],
+            'overdue': totals['overdue'],
+            'by_status': [
+                {'key': s.key, 'label': s.label, 'color': s.color, 'count': totals[f'status_{s.key}']}
+                for s in STATUS_CHOICES
+            ],
+            'by_priority': [
+                {'key': key, 'label': label, 'count': totals[f'priority_{key}']}
+                for key, label in PRIORITY_CHOICES
+            ],
+            'by_employee': [
+                {
+                    'employee_id': row['employee_id'],
+                    'employee_name': f"{row['employee__firstname']} {row['employee__lastname']}",
+                    'total': row['total'],
+                    'open': row['open'],
+                    'overdue': row['overdue'],
+                }
+                for row in workload
+            ],
+        })
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        GET /api/tasks/search/?q=... - 标题和描述的全文检索，按相关度排序，带 <mark> 高亮
+        也支持列表的过滤参数（status、employee ...）
+        """
+        text, limit = search_params(request)
+        if not text:
+            return Response({'results': []})
+        filtered = set(request.query_params) - {'q', 'limit'}
+        queryset = self.filter_queryset(Task.objects.all()) if filtered else None
+        hits = search(Task, text, limit, queryset)
+
+        tasks = Task.objects.select_related('employee', 'tester').in_bulk([hit.pk for hit in hits])
+        results = [
+            {**TaskSummarySerializer(tasks[hit.pk]).data, 'rank': hit.rank, 'highlight': hit.highlight}
+            for hit in hits if hit.pk in tasks
+        ]
+        return Response({'results': results})
+
+    @action(detail=False, methods=['get'], renderer_classes=[CSVRenderer, NDJSONRenderer])
+    def export(self, request):
+        """
+        GET /api/tasks/export/?format=csv|ndjson - 流式导出所有任务（含评论），支持列表的过滤参数
+        ?comments=false 不导出评论
+        """
+        queryset = self.filter_queryset(Task.objects.all())
+        comments = request.query_params.get('comments', 'true').lower() not in ('false', '0')
+        file_format = request.accepted_renderer.format
+        fields = EXPORT_TASK_FIELDS + (['comments'] if comments else [])
+
+        chunks = encode(export_tasks(queryset, comments), file_format, fields)
+        if isinstance(request._request, ASGIRequest):
+            chunks = async_chunks(chunks)  # daphne / uvicorn 下逐块发送，不在内存里拼出整个文件
+        response = StreamingHttpResponse(
+            chunks,
+            content_type=f'{request.accepted_renderer.media_type}; charset=utf-8',
+        )
+        filename = f"tasks-{timezone.now():%Y%m%d}.{file_format}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    @action(detail=False, methods=['post', 'patch', 'delete'])
+    def bulk(self, request):
+        """
+        批量操作，整个请求在一个事务里完成，返回每一条的结果：
+        POST   /api/tasks/bulk/  [{...}, ...]             批量创建
+        PATCH  /api/tasks/bulk/  [{"id": 1, ...}, ...]    批量部分更新（例如重新分配 employee_id）
+        DELETE /api/tasks/bulk/  {"ids": [1, 2, ...]}     批量删除
+        任何一条校验失败时返回 400 和逐条的错误，不写入任何数据
+        """
+        handlers = {'POST': self.create_many, 'PATCH': self.update_many, 'DELETE': self.delete_many}
+        return handlers[request.method](request)
+
+    def create_many(self, request):
+        serializer = TaskSerializer(data=request.data, many=True, max_length=MAX_BULK_ITEMS)
+        serializer.is_valid(raise_exception=True)
+
+        tasks = [Task(**values) for values in serializer.validated_data]
+        with transaction.atomic():
+            Task.objects.bulk_create(tasks, batch_size=BULK_BATCH_SIZE)
+            # bulk_create 不发送 signal，手动更新工作量、让缓存失效并推送变更
+            rebuild_workload(assignees(tasks))
+            publish_many([task_event(task, 'created', TASK_FIELDS) for task in tasks])
+        bump_generation_on_commit(Task)
+        return Response(
+            {'results': [{'id': task.id, 'status': 'created'} for task in tasks]},
+            status=http_status.HTTP_201_CREATED,
+        )
+
+    def update_many(self, request):
+        serializer = TaskBulkUpdateSerializer(data=request.data, many=True, partial=True, max_length=MAX_BULK_ITEMS)
+        serializer.is_valid(raise_exception=True)
+
+        # 同一个 id 出现多次时按顺序合并
+        changes = {}
+        for values in serializer.validated_data:
+            changes.setdefault(values.pop('id'), {}).update(values)
+        fields = {'updated_at', *(name for values in changes.values() for name in values)}
+
+        now = timezone.now()
+        with transaction.atomic():
+            # 只加载要改的列（以及推送变更时用到的列）；bulk_update 会读取每个对象上的所有 fields
+            tasks = Task.objects.select_for_update().only(
+                *fields, 'status', 'end_date', 'employee_id', 'tester_id'
+            ).in_bulk(list(changes))
+            events = []
+            affected = assignees(tasks.values())  # 修改前的负责人 / 测试人
+            for pk, task in tasks.items():
+                for name, value in changes[pk].items():
+                    setattr(task, name, value)
+                task.updated_at = now  # bulk_update 不会触发 auto_now
+                events.append(task_event(task, 'updated', [f for f in TASK_FIELDS if f in task.changed_fields()]))
+            Task.objects.bulk_update(tasks.values(), sorted(fields), batch_size=BULK_BATCH_SIZE)
+            rebuild_workload(affected | assignees(tasks.values()))
+            publish_many(events)
+        bump_generation_on_commit(Task)
+        return Response({'results': [
+            {'id': pk, 'status': 'updated' if pk in tasks else 'not_found'} for pk in changes
+        ]})
+
+    def delete_many(self, request):
+        serializer = BulkIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+
+        with transaction.atomic():
+            tasks = list(Task.objects.select_for_update().filter(id__in=ids).only('id', 'employee_id', 'tester_id'))
+            existing = {task.pk for task in tasks}
+            if existing:
+                # 直接按 ID 删除（先删评论），不逐条发送 signal；工作量、推送、缓存失效在这里一次完成
+                delete_ids(Comment, list(existing), column='task_id')
+                delete_ids(Task, list(existing))
+                rebuild_workload(assignees(tasks))
+                publish_many([task_event(task, 'deleted') for task in tasks])
+        if existing:
+            bump_generation_on_commit(Task, Comment)
+        return Response({'results': [
+            {'id': pk, 'status': 'deleted' if pk in existing else 'not_found'} for pk in dict.fromkeys(ids)
+        ]})
+
+    @action(detail=False, methods=['post'], url_path='bulk/status')
+    def bulk_status(self, request):
+        """
+        POST /api/tasks/bulk/status/ {"ids": [...], "status": "archiviert"}
+        状态流转用一条 UPDATE 完成；已经是目标状态的任务不修改（updated_at 不变）
+        """
+        serializer = BulkStatusSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids, status = serializer.validated_data['ids'], serializer.validated_data['status']
+
+        now = timezone.now()
+        with transaction.atomic():
+            rows = list(Task.objects.select_for_update().filter(id__in=ids).values_list(
+                'id', 'status', 'end_date', 'employee_id', 'tester_id'
+            ))
+            current = {row[0]: row[1] for row in rows}
+            changed = [pk for pk, value in current.items() if value != status]
+            if changed:
+                Task.objects.filter(id__in=changed).update(status=status, updated_at=now)
+                rebuild_workload({pk for row in rows if row[1] != status for pk in row[3:] if pk})
+                publish_many([
+                    task_event(Task(id=pk, status=status, end_date=end_date, employee_id=employee_id,
+                                    tester_id=tester_id, updated_at=now), 'updated', ['status', 'updated_at'])
+                    for pk, value, end_date, employee_id, tester_id in rows if value != status
+                ])
+        if changed:
+            bump_generation_on_commit(Task)  # update() 不发送 signal
+
+        def result(pk):
+            if pk not in current:
+                return 'not_found'
+            return 'updated' if current[pk] != status else 'unchanged'
+        return Response({'results': [{'id': pk, 'status': result(pk)} for pk in dict.fromkeys(ids)]})
+
+    def paginated_response(self, queryset):
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
     def list_by_status(self, request, status):
-        queryset = self.get_queryset().filter(status=status)
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        # 只应用已归档过滤，其余过滤参数不适用于这两个路由
+        queryset = ActiveTaskFilter().filter_queryset(request, self.get_queryset(), self).filter(status=status)
+        return self.conditional(queryset, lambda: self.cached(lambda: self.paginated_response(queryset)))
     
     def list_by_department(self, request, department):
-        queryset = self.get_queryset().filter(department=department)
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        queryset = ActiveTaskFilter().filter_queryset(request, self.get_queryset(), self).filter(
+            employee__department=department
+        )
+        return self.conditional(queryset, lambda: self.cached(lambda: self.paginated_response(queryset)))
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ConditionalGetMixin, FieldSelectionMixin, viewsets.ModelViewSet):
     queryset = Comment.objects.all()
     serializer_class = CommentSerializer
+    cache_models = (Comment, Task, Employee)
+    pagination_class = CreatedAtCursorPagination
+    filter_backends = [FullTextSearchFilter]
     
    
     def get_queryset(self):
         queryset = super().get_queryset()
+        if self.request.method == 'GET':
+            queryset = self.select_columns(queryset)
+        else:
+            queryset = queryset.select_related('task', 'author')
 
          # // GET /api/comments/?task_id=72 - 根据task_id过滤评论
         task_id = self.request.query_params.get('task_id')
@@ -64,4 +397,103 @@ class CommentViewSet(viewsets.ModelViewSet):
         if author_id:
             queryset = queryset.filter(author_id=author_id)
             
-        return queryset
\ No newline at end of file
+        return queryset
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """GET /api/comments/search/?q=...&task_id=72 - 评论全文检索，按相关度排序，带 <mark> 高亮"""
+        text, limit = search_params(request)
+        if not text:
+            return Response({'results': []})
+        filtered = {'task_id', 'author_id'} & set(request.query_params)
+        queryset = self.get_queryset() if filtered else None
+        hits = search(Comment, text, limit, queryset)
+
+        comments = Comment.objects.select_related('task', 'author').in_bulk([hit.pk for hit in hits])
+        results = [
+            {**CommentSerializer(comments[hit.pk]).data, 'rank': hit.rank, 'highlight': hit.highlight}
+            for hit in hits if hit.pk in comments
+        ]
+        return Response({'results': results})
+
+
+class ArchivedTaskViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    GET  /api/archive/tasks/               已移到归档表的任务（只读，见 api/archive.py）
+    GET  /api/archive/tasks/<id>/          详情，带评论
+    POST /api/archive/tasks/<id>/restore/  连同评论移回任务表
+    """
+    queryset = ArchivedTask.objects.all()
+    serializer_class = ArchivedTaskSerializer
+    pagination_class = CreatedAtCursorPagination
+    filter_backends = [filters.SearchFilter]
+    search_fields = ['title']
+
+    def get_serializer_class(self):
+        return ArchivedTaskDetailSerializer if self.action == 'retrieve' else ArchivedTaskSerializer
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'retrieve':
+            queryset = queryset.prefetch_related('comments')
+        return queryset
+
+    @action(detail=True, methods=['post'])
+    def restore(self, request, pk=None):
+        task = self.get_object()
+        restore_tasks([task.id])
+        return Response({'id': task.id, 'status': 'restored'})
+
+
+class JobViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    后台任务（由 run_jobs 命令执行，见 api/jobs.py）：
+    POST /api/jobs/                 {"kind": "import" | "export" | "rebuild_stats", "params": {...}}，返回 202
+    GET  /api/jobs/                 最近的任务，?status=queued,running
+    GET  /api/jobs/<id>/            状态、进度（progress 0–100）和结果，客户端轮询
+    POST /api/jobs/<id>/cancel/     取消排队中或执行中的任务
+    GET  /api/jobs/<id>/download/   导出任务的结果文件
+    """
+    queryset = Job.objects.all()
+    serializer_class = JobSerializer
+    pagination_class = CreatedAtCursorPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve'):
+            queryset = queryset.defer('params')  # 导入任务的数据可能有几 MB
+        status = self.request.query_params.get('status')
+        if status:
+            queryset = queryset.filter(status__in=status.split(','))
+        return queryset
+
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        response.status_code = http_status.HTTP_202_ACCEPTED  # 已排队，还没有执行
+        response['Location'] = f"{request.path}{response.data['id']}/"
+        return response
+
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        job = self.get_object()
+        if not cancel_job(job):
+            return Response({'detail': f'Job ist bereits {job.status}.'}, status=http_status.HTTP_409_CONFLICT)
+        job.refresh_from_db()
+        return Response(self.get_serializer(job).data)
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        job = self.get_object()
+        if job.kind != 'export' or job.status != JOB_SUCCEEDED:
+            return Response({'detail': 'Keine Exportdatei vorhanden.'}, status=http_status.HTTP_404_NOT_FOUND)
+        path = job_file(job)
+        if not path.exists():
+            raise Http404
+        return FileResponse(open(path, 'rb'), as_attachment=True, filename=f"tasks-job-{job.pk}.{job.params['format']}")
+
+
+def metrics(request):
+    """GET /metrics：Prometheus 文本格式的请求统计（只在 API_PROFILING 打开时提供）"""
+    if not settings.API_PROFILING:
+        raise Http404
+    return HttpResponse(prometheus_text(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,118 @@
+"""
+EmployeeWorkload 的维护：
+- 增量：Task 保存/删除时，算出任务保存前后对各员工计数的“贡献”，只更新差值（F() 原子加减）
+- 重建：按员工 GROUP BY 重新计算（批量写入之后、以及每天校正 overdue_tasks）
+"""
+from collections import Counter, defaultdict
+
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .models import CLOSED_STATUSES, Employee, EmployeeWorkload, Task, overdue_q
+
+COUNTERS = ['open_tasks', 'overdue_tasks', 'completed_tasks', 'open_tests']
+# 决定任务贡献的列
+WORKLOAD_FIELDS = ('employee_id', 'tester_id', 'status', 'end_date')
+
+
+def contribution(values, today=None):
+    """一个任务对各员工计数的贡献：{employee_id: Counter}；values 为 None 表示任务不存在"""
+    result = defaultdict(Counter)
+    if values is None:
+        return result
+    today = today or timezone.now().date()
+    is_open = values['status'] not in CLOSED_STATUSES
+    if values['employee_id']:
+        counter = result[values['employee_id']]
+        if is_open:
+            counter['open_tasks'] += 1
+            if values['end_date'] and values['end_date'] < today:
+                counter['overdue_tasks'] += 1
+        elif values['status'] == 'abgeschlossen':
+            counter['completed_tasks'] += 1
+    if values['tester_id'] and is_open:
+        result[values['tester_id']]['open_tests'] += 1
+    return result
+
+
+def task_values(task):
+    return {name: getattr(task, name) for name in WORKLOAD_FIELDS}
+
+
+def loaded_values(task):
+    """保存前的值：优先用加载时的快照，快照不完整时查一次数据库"""
+    loaded = getattr(task, '_loaded_values', None) or {}
+    if all(name in loaded for name in WORKLOAD_FIELDS):
+        return {name: loaded[name] for name in WORKLOAD_FIELDS}
+    return Task.objects.filter(pk=task.pk).values(*WORKLOAD_FIELDS).first()
+
+
+def apply_delta(before, after):
+    """把前后贡献的差值写入 EmployeeWorkload，每个受影响的员工一条 UPDATE"""
+    today = timezone.now().date()
+    old, new = contribution(before, today), contribution(after, today)
+    missing = []
+    for employee_id in old.keys() | new.keys():
+        delta = {name: new[employee_id][name] - old[employee_id][name] for name in COUNTERS}
+        delta = {name: value for name, value in delta.items() if value}
+        if not delta:
+            continue
+        updated = EmployeeWorkload.objects.filter(employee_id=employee_id).update(
+            **{name: F(name) + value for name, value in delta.items()}, updated_at=timezone.now()
+        )
+        if not updated:
+            missing.append(employee_id)
+    if missing:
+        rebuild_workload(missing)  # 还没有汇总行的员工直接完整计算
+
+
+def expected_counts(employee_ids=None):
+    """按员工从 Task 表计算应有的计数（两条 GROUP BY）：返回 (员工 ID 列表, {员工 ID: Counter})"""
+    employees = Employee.objects.order_by()
+    tasks = Task.objects.order_by()
+    if employee_ids is not None:
+        employee_ids = set(employee_ids)
+        employees = employees.filter(id__in=employee_ids)
+        assigned = tasks.filter(employee_id__in=employee_ids)
+        testing = tasks.filter(tester_id__in=employee_ids)
+    else:
+        assigned = tasks.filter(employee__isnull=False)
+        testing = tasks.filter(tester__isnull=False)
+
+    counts = defaultdict(Counter)
+    for row in assigned.values('employee_id').annotate(
+        open_tasks=Count('id', filter=~Q(status__in=CLOSED_STATUSES)),
+        overdue_tasks=Count('id', filter=overdue_q()),
+        completed_tasks=Count('id', filter=Q(status='abgeschlossen')),
+    ):
+        counts[row.pop('employee_id')].update(row)
+    for row in testing.exclude(status__in=CLOSED_STATUSES).values('tester_id').annotate(open_tests=Count('id')):
+        counts[row['tester_id']]['open_tests'] = row['open_tests']
+    return list(employees.values_list('id', flat=True)), counts
+
+
+def rebuild_workload(employee_ids=None):
+    """重新计算并 upsert 汇总行，employee_ids 为 None 时重建全部；返回写入的行数"""
+    employees, counts = expected_counts(employee_ids)
+    now = timezone.now()
+    rows = [
+        EmployeeWorkload(employee_id=pk, updated_at=now, **{name: counts[pk][name] for name in COUNTERS})
+        for pk in employees
+    ]
+    EmployeeWorkload.objects.bulk_create(
+        rows, batch_size=1000, update_conflicts=True, unique_fields=['employee'],
+        update_fields=[*COUNTERS, 'updated_at'],
+    )
+    return len(rows)
+
+
+def workload_drift():
+    """汇总表与实际任务不一致的员工 ID（一致性检查）"""
+    employees, counts = expected_counts()
+    stored = {
+        row.pop('employee_id'): row for row in EmployeeWorkload.objects.values('employee_id', *COUNTERS)
+    }
+    return [
+        pk for pk in employees
+        if pk not in stored or any(stored[pk][name] != counts[pk][name] for name in COUNTERS)
+    ]
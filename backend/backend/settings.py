@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
-from djangorestframework_camel_case.render import CamelCaseJSONRenderer
+from corsheaders.defaults import default_headers
+
+from .database import database_config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -32,6 +35,7 @@ ALLOWED_HOSTS = []
 # Application definition
 
 INSTALLED_APPS = [
+    'daphne',  # runserver 以 ASGI 方式运行，同时提供 WebSocket
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -41,10 +45,13 @@ INSTALLED_APPS = [
 
     'rest_framework',
     'corsheaders',
+    'channels',
     'api',
 ]
 
 MIDDLEWARE = [
+    'api.profiling.ProfilingMiddleware',  # 只有 API_PROFILING 打开时生效，放在最前面才能统计整个请求
+    'api.compression.CompressionMiddleware',  # 在所有读写响应内容的中间件之前
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',  # 添加CORS中间件,要放在前面
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -73,18 +80,99 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'backend.wsgi.application'
+ASGI_APPLICATION = 'backend.asgi.application'
 
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# 通过 DATABASE_URL 切换到 PostgreSQL，详见 backend/database.py
+
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+    'default': database_config(BASE_DIR),
+}
+
+
+# Cache
+# 默认进程内 LocMem；DJANGO_CACHE_LOCATION 为 redis:// 地址时使用 Redis，为目录时使用文件缓存
+
+CACHE_LOCATION = os.environ.get('DJANGO_CACHE_LOCATION', '')
+
+if CACHE_LOCATION.startswith(('redis://', 'rediss://')):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_LOCATION,
+        }
+    }
+elif CACHE_LOCATION:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': CACHE_LOCATION,
+        }
     }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'aufgabenplaner',
+        }
+    }
+
+# API 响应缓存（api/cache.py）：秒数，0 表示关闭
+API_CACHE_ALIAS = 'default'
+API_CACHE_TIMEOUT = int(os.environ.get('API_CACHE_TIMEOUT', 300))
+
+# 任务归档（api/archive.py，命令 archive_tasks）：状态为“已归档”超过 ARCHIVE_AFTER_DAYS 天的任务移到归档表，
+# 在归档表里超过 ARCHIVE_PURGE_AFTER_DAYS 天的彻底删除（0 表示永久保留）
+ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS', 90))
+ARCHIVE_PURGE_AFTER_DAYS = int(os.environ.get('ARCHIVE_PURGE_AFTER_DAYS', 0))
+
+# 请求性能统计（api/profiling.py）：API_PROFILING=true 时每个响应带 Server-Timing 头，
+# 每个请求写一行 JSON 日志（logger api.profiling），/metrics 输出 Prometheus 指标
+API_PROFILING = os.environ.get('API_PROFILING', '').lower() in ('1', 'true', 'yes', 'on')
+API_PROFILING_REPEATED_QUERIES = int(os.environ.get('API_PROFILING_REPEATED_QUERIES', 5))  # N+1 判定阈值
+
+# 响应压缩（api/compression.py）：超过这个字节数的响应按 Accept-Encoding 用 br（安装了 brotli 时）或 gzip 压缩
+API_COMPRESS_MIN_BYTES = int(os.environ.get('API_COMPRESS_MIN_BYTES', 1024))
+
+# JSON / MessagePack 键名风格（api/renderers.py）：默认 snake_case，与前端的模型一致；
+# API_JSON_CAMEL_CASE=true 时响应的键名转成 camelCase，请求体的键名转回 snake_case
+API_JSON_CAMEL_CASE = os.environ.get('API_JSON_CAMEL_CASE', '').lower() in ('1', 'true', 'yes', 'on')
+
+# 后台任务（api/jobs.py，命令 run_jobs）：导出任务的结果文件放在 JOB_FILES_DIR；
+# 执行中超过 JOB_STALE_AFTER 秒没有写进度的任务视为 worker 已退出，worker 启动时重新排队
+JOB_FILES_DIR = Path(os.environ.get('JOB_FILES_DIR', BASE_DIR / 'job_files'))
+JOB_STALE_AFTER = int(os.environ.get('JOB_STALE_AFTER', 600))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'api.profiling': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+        'api.jobs': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
 }
 
+# 实时推送（api/realtime.py）的 channel layer：
+# CHANNEL_REDIS_URL=redis://localhost:6379/1 时多个进程共享，否则只在当前进程内
+CHANNEL_REDIS_URL = os.environ.get('CHANNEL_REDIS_URL', '')
+if CHANNEL_REDIS_URL:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {'hosts': [CHANNEL_REDIS_URL]},
+        }
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'},
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -132,22 +220,26 @@ CORS_ALLOWED_ORIGINS = [
     "http://localhost:4200",
     "http://127.0.0.1:4200",
 ]
+# 条件请求：前端要能读到 ETag，并发送 If-None-Match
+CORS_EXPOSE_HEADERS = ['ETag', 'Last-Modified', 'Server-Timing']
+CORS_ALLOW_HEADERS = (*default_headers, 'if-none-match')
 
 # REST Framework配置
+# 注意：settings 里不要 import rest_framework 或依赖它的包，否则 DRF 在这里定义之前就读取并缓存了配置，整个 REST_FRAMEWORK 被忽略
+# 默认不分页：任务和评论列表在视图里指定游标分页，员工列表返回全部
 REST_FRAMEWORK = {
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 100,
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',  # 开发时允许所有访问
-    ],  
-    
+    ],
     'DEFAULT_RENDERER_CLASSES': (
-        'djangorestframework_camel_case.render.CamelCaseJSONRenderer',
-        'djangorestframework_camel_case.render.CamelCaseBrowsableAPIRenderer',
+        'api.renderers.FastJSONRenderer',
+        'api.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
     ),
     'DEFAULT_PARSER_CLASSES': (
-        'djangorestframework_camel_case.parser.CamelCaseJSONParser',
-        'djangorestframework_camel_case.parser.CamelCaseFormParser',
-        'djangorestframework_camel_case.parser.CamelCaseMultiPartParser',
+        'api.renderers.FastJSONParser',
+        'api.renderers.MessagePackParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ),
 }
@@ -8,6 +8,7 @@ import { provideHttpClient,  withFetch,  withInterceptors} from '@angular/common
 import { createInterceptorCondition, INCLUDE_BEARER_TOKEN_INTERCEPTOR_CONFIG, IncludeBearerTokenCondition, includeBearerTokenInterceptor, KEYCLOAK_EVENT_SIGNAL, KeycloakService, provideKeycloak } from 'keycloak-angular';
 import { dummyKeycloak } from './auth/keycloak.dummy';
 import Keycloak from 'keycloak-js';
+import { etagInterceptor } from './interceptors/etag.interceptor';
 
 
 function getBaseUrl(): string {
@@ -42,7 +43,7 @@ export const appConfig: ApplicationConfig = {
     provideHttpClient(
       withFetch(),
       isBrowser 
-        ? withInterceptors([includeBearerTokenInterceptor])
+        ? withInterceptors([includeBearerTokenInterceptor, etagInterceptor])
         : withInterceptors([])
     ),
 
@@ -65,6 +65,11 @@ export class OverviewList {
     );      
   }
       
+  // 部门过滤交给后端（/api/tasks/?department=），只传输需要的任务
+  onDepartmentChange(department: string) {
+    this.taskService.loadTasks(department === 'alle' ? undefined : { department });
+  }
+
    viewTaskDetail(taskId: number){
     this.router.navigate(['/tasks', 'detail', taskId]);
   }
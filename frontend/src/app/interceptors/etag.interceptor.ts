@@ -0,0 +1,39 @@
+import { HttpErrorResponse, HttpInterceptorFn, HttpResponse } from '@angular/common/http';
+import { catchError, of, tap, throwError } from 'rxjs';
+
+// 每个 GET URL 最近一次的 ETag 和响应体
+const MAX_ENTRIES = 200;
+const etagCache = new Map<string, { etag: string; body: unknown }>();
+
+// 条件请求：带上 If-None-Match，后端返回 304 时直接使用本地缓存的响应体
+export const etagInterceptor: HttpInterceptorFn = (req, next) => {
+  if (req.method !== 'GET') {
+    return next(req);
+  }
+
+  const key = req.urlWithParams;
+  const cached = etagCache.get(key);
+  const request = cached ? req.clone({ setHeaders: { 'If-None-Match': cached.etag } }) : req;
+
+  return next(request).pipe(
+    tap(event => {
+      if (event instanceof HttpResponse) {
+        const etag = event.headers.get('ETag');
+        if (etag) {
+          etagCache.delete(key);  // 重新插入，保持 Map 的插入顺序即最近使用顺序
+          etagCache.set(key, { etag, body: event.body });
+          if (etagCache.size > MAX_ENTRIES) {
+            etagCache.delete(etagCache.keys().next().value!);
+          }
+        }
+      }
+    }),
+    catchError(error => {
+      // HttpClient 把 304 当作错误处理
+      if (error instanceof HttpErrorResponse && error.status === 304 && cached) {
+        return of(new HttpResponse({ body: cached.body, headers: error.headers, status: 200, url: error.url ?? undefined }));
+      }
+      return throwError(() => error);
+    })
+  );
+};
@@ -0,0 +1,7 @@
+// /api/tasks/bulk/ 的返回：每一条的处理结果，顺序与请求一致
+export interface BulkResult {
+  results: {
+    id: number;
+    status: 'created' | 'updated' | 'unchanged' | 'deleted' | 'not_found';
+  }[];
+}
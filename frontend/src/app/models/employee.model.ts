@@ -8,4 +8,9 @@ export interface Employee {
   role: Role;
   department: string;
   is_active: boolean;
+  // 只在 /api/employees/ 中返回（EmployeeWorkload 汇总表）
+  open_tasks?: number;
+  overdue_tasks?: number;
+  completed_tasks?: number;
+  open_tests?: number;
 }
@@ -0,0 +1,8 @@
+// ws://.../ws/feed/ 推送的变更：fields 只包含变化的字段
+export interface FeedEvent {
+  id: string;
+  model: 'task' | 'comment';
+  op: 'created' | 'updated' | 'deleted';
+  pk: number;
+  fields: Record<string, any>;
+}
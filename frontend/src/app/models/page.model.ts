@@ -0,0 +1,6 @@
+// 后端游标分页的响应格式（没有 count，只有 next / previous 游标链接）
+export interface CursorPage<T> {
+  next: string | null;
+  previous: string | null;
+  results: T[];
+}
@@ -0,0 +1,17 @@
+import { PriorityKey } from "./priority";
+import { StatusKey } from "./status";
+
+// GET /api/tasks/stats/ 的响应（后端用 SQL 聚合）
+export interface TaskStats {
+  total: number;
+  overdue: number;
+  by_status: { key: StatusKey; label: string; color: string; count: number }[];
+  by_priority: { key: PriorityKey; label: string; count: number }[];
+  by_employee: {
+    employee_id: number;
+    employee_name: string;
+    total: number;
+    open: number;
+    overdue: number;
+  }[];
+}
@@ -16,7 +16,15 @@ export interface Task {
   tester?: Employee|null; 
   created_by?: Employee|null; 
   updated_by?: Employee|null; 
-  comments: Comment[]|null;
+  // 列表接口的精简表示只返回扁平的 ID 和姓名（?expand= 可取回嵌套对象）
+  employee_id?: number|null;
+  employee_name?: string|null;
+  tester_id?: number|null;
+  tester_name?: string|null;
+  comments?: Comment[]|null;
+  // 评论数量和最近评论时间（后端冗余存储，列表不再需要加载评论）
+  comment_count?: number;
+  last_comment_at?: string|null;
   version?: string;
   status_color: string;
   is_overdue: boolean;
@@ -1,9 +1,12 @@
 import { Injectable } from '@angular/core';
 import { environment } from '../../environment/environment';
 import { HttpClient, HttpParams } from '@angular/common/http';
-import { BehaviorSubject, map, Observable, tap } from 'rxjs';
+import { BehaviorSubject, filter, map, Observable, tap } from 'rxjs';
 import { Comment } from '../models/comment.model';
 import { Task } from '../models/task.model';
+import { fetchAllPages } from './cursor-pagination';
+import { RealtimeService } from './realtime.service';
+import { FeedEvent } from '../models/feed-event.model';
 
 @Injectable({
   providedIn: 'root'
@@ -18,7 +21,30 @@ export class CommentService {
   public comments$ = this.commentsSubject$.asObservable();
   
 
-  constructor(private http: HttpClient) {}
+  // getCommentsByTaskId 加载的任务，推送的新评论只加入这个任务的缓存
+  private taskId?: number;
+
+  constructor(private http: HttpClient, private realtime: RealtimeService) {
+    this.realtime.feed$.pipe(filter(event => event.model === 'comment'))
+      .subscribe(event => this.applyEvent(event));
+  }
+
+  private applyEvent(event: FeedEvent): void {
+    const current = this.commentsSubject$.getValue();
+    if (event.op === 'deleted') {
+      this.commentsSubject$.next(current.filter(c => c.id !== event.pk));
+    } else if (current.some(c => c.id === event.pk)) {
+      this.commentsSubject$.next(current.map(c => c.id === event.pk ? { ...c, ...event.fields } : c));
+    } else if (event.op === 'created' && event.fields['task_id'] === this.taskId) {
+      // task_title、author_name 不在推送里，取一次完整的评论
+      this.getCommentById(event.pk).subscribe(comment => {
+        const latest = this.commentsSubject$.getValue();
+        if (!latest.some(c => c.id === comment.id)) {
+          this.commentsSubject$.next([...latest, comment]);
+        }
+      });
+    }
+  }
 
   // 加载所有评论到缓存
   loadComments(filters?: any): void {  
@@ -32,7 +58,7 @@ export class CommentService {
       });
     }
 
-    this.http.get<Comment[]>(this.apiUrl + '/', { params }).subscribe({
+    fetchAllPages<Comment>(this.http, this.apiUrl + '/', params).subscribe({
       next: (comments) => {
         this.commentsSubject$.next(comments);        
       },
@@ -54,8 +80,9 @@ export class CommentService {
 
   // GET /api/comments/?task_id=72 - 根据task_id过滤评论
   getCommentsByTaskId(taskId: number): Observable<Comment[]> {
+     this.taskId = taskId;
      const params = new HttpParams().set('task_id', taskId.toString());
-     return this.http.get<Comment[]>(this.apiUrl + '/', { params }).pipe(
+     return fetchAllPages<Comment>(this.http, this.apiUrl + '/', params).pipe(
     tap(comments => this.commentsSubject$.next(comments))
   );
   }
@@ -68,7 +95,7 @@ export class CommentService {
   // GET /api/comments/?author_id=1 - 按用户ID过滤评论
   getCommentsByAuthorId(authorId: number): Observable<Comment[]> {
     const params = new HttpParams().set('author_id', authorId.toString());
-    return this.http.get<Comment[]>(this.apiUrl + '/', { params });
+    return fetchAllPages<Comment>(this.http, this.apiUrl + '/', params);
   }
 
   // ===== 修改操作（同时更新缓存和后端）=====
@@ -77,8 +104,8 @@ export class CommentService {
     return this.http.post<Comment>(this.apiUrl + '/', comment).pipe(
       tap({
       next: (newComment) => {
-        const current = this.commentsSubject$.getValue();
-        this.commentsSubject$.next([...current, newComment]);
+        const current = this.commentsSubject$.getValue().filter(c => c.id !== newComment.id);
+        this.commentsSubject$.next([...current, newComment]); // 推送的事件可能已经先把它加进来了
       },
       error: (error) => {
         console.error('Failed to create comment:', error);
@@ -0,0 +1,12 @@
+import { HttpClient, HttpParams } from '@angular/common/http';
+import { EMPTY, expand, map, Observable, reduce } from 'rxjs';
+import { CursorPage } from '../models/page.model';
+
+// 从第一页开始沿着 next 游标依次请求，合并所有页的结果
+export function fetchAllPages<T>(http: HttpClient, url: string, params?: HttpParams): Observable<T[]> {
+  return http.get<CursorPage<T>>(url, { params }).pipe(
+    expand(page => page.next ? http.get<CursorPage<T>>(page.next) : EMPTY),
+    map(page => page.results),
+    reduce((all, results) => all.concat(results), [] as T[])
+  );
+}
@@ -0,0 +1,33 @@
+import { Injectable } from '@angular/core';
+import { EMPTY, filter, Observable, retry, share, timer } from 'rxjs';
+import { webSocket } from 'rxjs/webSocket';
+import { environment } from '../../environment/environment';
+import { FeedEvent } from '../models/feed-event.model';
+
+@Injectable({
+  providedIn: 'root'
+})
+export class RealtimeService {
+  // http://localhost:8000/api -> ws://localhost:8000/ws/feed/
+  private feedUrl = environment.apiUrl.replace(/^http/, 'ws').replace(/\/api\/?$/, '') + '/ws/feed/';
+
+  // 所有 Task / Comment 变更，多个订阅者共用一个连接
+  public feed$ = this.events();
+
+  // 只订阅某些任务或某个员工的变更，例如 events({ task: [72] })、events({ employee: [3] })
+  events(subscriptions?: { task?: number[]; employee?: number[] }): Observable<FeedEvent> {
+    if (typeof WebSocket === 'undefined') {
+      return EMPTY; // SSR：服务器端没有 WebSocket
+    }
+    const query = Object.entries(subscriptions ?? {})
+      .filter(([, ids]) => ids && ids.length)
+      .map(([key, ids]) => `${key}=${ids!.join(',')}`)
+      .join('&');
+
+    return webSocket<FeedEvent>(query ? `${this.feedUrl}?${query}` : this.feedUrl).pipe(
+      filter(message => 'op' in message),
+      retry({ delay: () => timer(3000) }), // 断线后 3 秒重连
+      share()
+    );
+  }
+}
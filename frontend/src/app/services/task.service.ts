@@ -1,8 +1,14 @@
 import { Injectable } from '@angular/core';
 import { environment } from '../../environment/environment';
-import { BehaviorSubject, catchError, map, Observable, of, tap } from 'rxjs';
+import { BehaviorSubject, catchError, debounceTime, filter, map, Observable, of, switchMap, tap } from 'rxjs';
 import { Task, TaskUpdateDTO } from '../models/task.model';
+import { TaskStats } from '../models/task-stats.model';
+import { BulkResult } from '../models/bulk-result.model';
+import { StatusKey } from '../models/status';
 import { HttpClient, HttpParams } from '@angular/common/http';
+import { fetchAllPages } from './cursor-pagination';
+import { RealtimeService } from './realtime.service';
+import { FeedEvent } from '../models/feed-event.model';
 
 
 @Injectable({
@@ -10,6 +16,8 @@ import { HttpClient, HttpParams } from '@angular/common/http';
 })
 export class TaskService {
   private apiUrl = `${environment.apiUrl}/tasks`;
+  // 列表接口默认返回精简表示，列表视图还需要员工的姓名和部门
+  private listParams = { expand: 'employee' };
   // 私有状态
   private tasksSubject$ = new BehaviorSubject<Task[]>([]); //BehaviorSubject--RxJS Subject，能存储最新值
   private loadingSubject$ = new BehaviorSubject<boolean>(false); //xxx$表示可观察对象（Observable）,可观察数据流
@@ -19,14 +27,57 @@ export class TaskService {
   public loading$ = this.loadingSubject$.asObservable();
   public error$ = this.errorSubject$.asObservable();
 
-  constructor(private http: HttpClient) {}
+  // 当前缓存对应的过滤条件，新建的任务只有在未过滤时才直接加入缓存
+  private filters?: any;
 
-  // 加载所有任务到缓存
+  constructor(private http: HttpClient, private realtime: RealtimeService) {
+    // 其他用户的修改通过 WebSocket 推送过来，直接合并到缓存里，不用轮询
+    this.realtime.feed$.pipe(filter(event => event.model === 'task'))
+      .subscribe(event => this.applyEvent(event));
+  }
+
+  private applyEvent(event: FeedEvent): void {
+    const current = this.tasksSubject$.getValue();
+    const index = current.findIndex(t => t.id === event.pk);
+
+    if (event.op === 'deleted') {
+      if (index !== -1) {
+        this.tasksSubject$.next(current.filter(t => t.id !== event.pk));
+      }
+      return;
+    }
+    if (index === -1 && (event.op !== 'created' || this.hasFilters())) {
+      return; // 不在当前列表里
+    }
+    if (index === -1 || 'employee_id' in event.fields || 'tester_id' in event.fields) {
+      // 新任务或换了负责人：嵌套的员工信息需要重新取一次
+      this.getTaskById(event.pk).subscribe(task => this.upsert(task));
+      return;
+    }
+    this.upsert({ ...current[index], ...event.fields });
+  }
+
+  private upsert(task: Task): void {
+    const current = this.tasksSubject$.getValue();
+    const index = current.findIndex(t => t.id === task.id);
+    this.tasksSubject$.next(index === -1
+      ? [...current, task]
+      : current.map(t => t.id === task.id ? task : t));
+  }
+
+  private hasFilters(): boolean {
+    return !!this.filters && Object.values(this.filters).some(value => !!value);
+  }
+
+  // 加载任务到缓存；filters 直接作为后端过滤参数
+  // （status、priority、employee、tester、department、start_date_from/to、end_date_from/to、overdue）
   loadTasks(filters?: any): void {
       this.loadingSubject$.next(true); //设置初始状态：进入加载中，清空错误
       this.errorSubject$.next(null);
+      this.filters = filters;
 
-      let params = new HttpParams();
+      // 列表接口默认不含已归档的任务，总览和列表视图按状态颜色显示全部任务
+      let params = new HttpParams({ fromObject: { ...this.listParams, include_archived: 'true' } });
       if (filters) {
         Object.keys(filters).forEach(key => {
           if (filters[key]) {
@@ -35,7 +86,8 @@ export class TaskService {
         });
       }
 
-      this.http.get<Task[]>(this.apiUrl + '/', {params}).subscribe({ 
+      // 列表是游标分页的，沿 next 链接取完所有页
+      fetchAllPages<Task>(this.http, this.apiUrl + '/', params).subscribe({ 
         next: (tasks) => {
           this.tasksSubject$.next(tasks); //将获取到的任务数组保存到缓存（BehaviorSubject）
           this.loadingSubject$.next(false);
@@ -59,7 +111,8 @@ export class TaskService {
 
   // 🔥 改为直接调用后端 API
 getTasksByStatus(status: string): Observable<Task[]> {
-  return this.http.get<Task[]>(`${this.apiUrl}/status/${status}/`).pipe(
+  const params = new HttpParams({ fromObject: this.listParams });
+  return fetchAllPages<Task>(this.http, `${this.apiUrl}/status/${status}/`, params).pipe(
     catchError(err => {
       console.error('Error loading tasks by status:', err);
       return of([]);
@@ -67,17 +120,31 @@ getTasksByStatus(status: string): Observable<Task[]> {
   );
 }
 
+  // GET /api/tasks/stats/ - 统计由后端聚合，filters 与列表相同
+  getStats(filters?: any): Observable<TaskStats> {
+    let params = new HttpParams();
+    if (filters) {
+      Object.keys(filters).forEach(key => {
+        if (filters[key]) {
+          params = params.set(key, filters[key]);
+        }
+      });
+    }
+    return this.http.get<TaskStats>(`${this.apiUrl}/stats/`, { params });
+  }
+
+  // 任务缓存变化时重新获取统计，不再在前端遍历所有任务；连续推送的变更合并为一次请求
   statusCounts$ = this.tasks$.pipe(
-    map(tasks => ({
-      'nicht_zugewiesen': tasks.filter(t => t.status === 'nicht_zugewiesen').length,
-      'offen': tasks.filter(t => t.status === 'offen').length,
-      'abgeschlossen': tasks.filter(t => t.status === 'abgeschlossen').length,
-      'archiviert': tasks.filter(t => t.status === 'archiviert').length
-    }))
+    debounceTime(300),
+    switchMap(() => this.getStats()),
+    map(stats => Object.fromEntries(
+      stats.by_status.map(s => [s.key, s.count])
+    ) as Record<StatusKey, number>)
   );
 
   getTasksByDepartment(department: string): Observable<Task[]> {
-  return this.http.get<Task[]>(`${this.apiUrl}/department/${department}/`).pipe(
+  const params = new HttpParams({ fromObject: this.listParams });
+  return fetchAllPages<Task>(this.http, `${this.apiUrl}/department/${department}/`, params).pipe(
     catchError(err => {
       console.error('Error loading tasks by department:', err);
       return of([]);
@@ -89,19 +156,16 @@ getTasksByStatus(status: string): Observable<Task[]> {
   return this.http.get<Task>(`${this.apiUrl}/${id}/`);
 }
 
-  // 通过 pipe 过滤任务（按员工）
+  // 按员工过滤由后端完成（/api/tasks/?employee=）
   getTasksByEmployee(employeeId: number): Observable<Task[]> {
-    return this.tasks$.pipe(
-      map(tasks => tasks.filter(task => task.employee?.id === employeeId))
-    );
-
+    const params = new HttpParams({ fromObject: this.listParams }).set('employee', employeeId);
+    return fetchAllPages<Task>(this.http, this.apiUrl + '/', params);
   }
   //调用后端接口创建任务（POST）
   createTask(task: Task): Observable<Task> {  
   return this.http.post<Task>(this.apiUrl + '/', task).pipe(
     tap(newTask => {   //后端返回的任务数据（newTask）与传入的 task 不完全一样
-      const current = this.tasksSubject$.getValue();
-      this.tasksSubject$.next([...current, newTask]); // 更新缓存
+      this.upsert(newTask); // 更新缓存（推送的事件可能已经先把它加进来了）
     })
   );
 }
@@ -128,6 +192,35 @@ updateTask(id: number, taskDto: Partial<Task> | TaskUpdateDTO): Observable<Task>
   );
 }
 
+  // 批量接口：一个请求、一个事务，返回每一条的结果；成功后重新加载缓存
+  bulkCreate(tasks: Partial<Task>[]): Observable<BulkResult> {
+    return this.http.post<BulkResult>(`${this.apiUrl}/bulk/`, tasks).pipe(
+      tap(() => this.refreshTasks())
+    );
+  }
+
+  // 每一项必须带 id，例如 [{ id: 1, employee_id: 5 }, ...]
+  bulkUpdate(changes: (Partial<Task> & { id: number })[]): Observable<BulkResult> {
+    return this.http.patch<BulkResult>(`${this.apiUrl}/bulk/`, changes).pipe(
+      tap(() => this.refreshTasks())
+    );
+  }
+
+  bulkSetStatus(ids: number[], status: StatusKey): Observable<BulkResult> {
+    return this.http.post<BulkResult>(`${this.apiUrl}/bulk/status/`, { ids, status }).pipe(
+      tap(() => this.refreshTasks())
+    );
+  }
+
+  bulkDelete(ids: number[]): Observable<BulkResult> {
+    return this.http.delete<BulkResult>(`${this.apiUrl}/bulk/`, { body: { ids } }).pipe(
+      tap(() => {
+        const removed = new Set(ids);
+        this.tasksSubject$.next(this.tasksSubject$.getValue().filter(t => !removed.has(t.id)));
+      })
+    );
+  }
+
   // 灵活解析日期（支持两种格式，内部统一处理）
 private parseFlexibleDate(dateStr: string): Date | null {
   if (!dateStr) return null;